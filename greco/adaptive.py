@@ -0,0 +1,158 @@
+"""Adaptive choice of targets.
+
+Instead of picking every target uniformly from the level, the
+scheduler keeps track of how often the player gets each character
+wrong and how long they take over it, and picks words containing the
+weak characters more often.
+
+Picking a target first picks a character, weighted by its weakness,
+from a Fenwick tree of weights (O(log c) for c characters), and then
+a word containing that character from an index of the level's words
+by character (O(1)), so the cost does not grow with the size of the
+level. The index of words does not depend on the player, so it is
+built once by the LevelIndex and shared, and each scheduler only
+keeps the weights.
+
+"""
+
+from __future__ import division
+
+# The chance of picking a target uniformly at random instead, so that
+# every word still comes up now and again
+EXPLORE = 0.2
+
+# How much each new observation moves the average time per character
+LATENCY_SMOOTHING = 0.2
+
+# How many levels' trees of weights are kept
+MAX_INDEXES = 4
+
+
+class FenwickTree(object):
+    """Prefix sums of a list of weights, with O(log n) updates and
+    O(log n) search for the index at which the sum reaches a value."""
+    def __init__(self, weights):
+        self._size = len(weights)
+        self._tree = [0.0] * (self._size + 1)
+        self._weights = [0.0] * self._size
+        for index, weight in enumerate(weights):
+            self.set(index, weight)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def total(self):
+        """The sum of all the weights."""
+        total = 0.0
+        position = self._size
+        while position > 0:
+            total += self._tree[position]
+            position -= position & -position
+        return total
+
+    def set(self, index, weight):
+        """Set the weight at index."""
+        delta = weight - self._weights[index]
+        self._weights[index] = weight
+        position = index + 1
+        while position <= self._size:
+            self._tree[position] += delta
+            position += position & -position
+
+    def find(self, value):
+        """Find the first index at which the prefix sum exceeds value."""
+        position = 0
+        step = 1
+        while step * 2 <= self._size:
+            step *= 2
+        while step:
+            following = position + step
+            if following <= self._size and self._tree[following] <= value:
+                position = following
+                value -= self._tree[following]
+            step //= 2
+        return min(position, self._size - 1)
+
+
+class AdaptiveScheduler(object):
+    """Chooses targets weighted towards the player's weak characters."""
+    def __init__(self):
+        self.attempts = {}
+        self.errors = {}
+        self.latency = {}
+        self._mean_latency = None
+        # (CharacterIndex, FenwickTree of its characters' weights) pairs
+        self._trees = []
+
+    def weight(self, character):
+        """How weak the player is at character: the smoothed error rate,
+        scaled by how slow they are at it compared to the others."""
+        error_rate = ((self.errors.get(character, 0) + 1) /
+                      (self.attempts.get(character, 0) + 2))
+        latency = self.latency.get(character)
+        if latency is None or not self._mean_latency:
+            return error_rate
+        return error_rate * latency / self._mean_latency
+
+    def record(self, target, confusions, seconds):
+        """Learn from a guess of target that took seconds and made the
+        given confusions (as listed by scoring.score_guess)."""
+        for character in target:
+            self.attempts[character] = self.attempts.get(character, 0) + 1
+        for confusion in confusions:
+            if confusion[0]:
+                self.errors[confusion[0]] = (
+                    self.errors.get(confusion[0], 0) + 1)
+        if target:
+            per_character = seconds / len(target)
+            for character in set(target):
+                old = self.latency.get(character, per_character)
+                self.latency[character] = old + LATENCY_SMOOTHING * (
+                    per_character - old)
+            if self._mean_latency is None:
+                self._mean_latency = per_character
+            else:
+                self._mean_latency += LATENCY_SMOOTHING * (
+                    per_character - self._mean_latency)
+        # The weights all depend on the mean latency, so update them all
+        for index, tree in self._trees:
+            for position, character in enumerate(index.characters):
+                tree.set(position, self.weight(character))
+
+    def get_state(self):
+        """Get what has been learnt as plain data."""
+        return {'attempts': dict(self.attempts), 'errors': dict(self.errors),
+                'latency': dict(self.latency),
+                'mean_latency': self._mean_latency}
+
+    def set_state(self, state):
+        """Replace what has been learnt with what was got by get_state."""
+        self.attempts = dict(state['attempts'])
+        self.errors = dict(state['errors'])
+        self.latency = dict(state['latency'])
+        self._mean_latency = state['mean_latency']
+        # The weights in the trees are out of date
+        self._trees = []
+
+    def _get_tree(self, index):
+        """Get the tree of the weights of the characters of index,
+        building it if needed."""
+        for known, tree in self._trees:
+            if known is index:
+                return tree
+        tree = FenwickTree([self.weight(character)
+                            for character in index.characters])
+        self._trees.insert(0, (index, tree))
+        del self._trees[MAX_INDEXES:]
+        return tree
+
+    def choose(self, index, rng):
+        """Choose a target from the words of index, a CharacterIndex
+        such as LevelIndex.character_index returns."""
+        tree = self._get_tree(index)
+        total = tree.total
+        if not index.characters or total <= 0 or rng.random() < EXPLORE:
+            return rng.choice(index.words)
+        position = tree.find(rng.random() * total)
+        return rng.choice(index.postings[position])
@@ -0,0 +1,93 @@
+"""Registry of the image assets used by the game.
+
+Each image is loaded from the package directory once, converted to
+the pixel format of the display, and shared from then on. How long
+each load took is recorded, to keep an eye on the cost of assets.
+
+Images can be prefetched, being read by the threads of an IOWorker so
+that the game loop does not wait for the disk, and converted when the
+game loop drains it.
+
+"""
+
+import os
+from collections import OrderedDict
+from timeit import default_timer as timer
+
+import pygame
+
+
+class AssetRegistry(object):
+    """Loads images once and serves them converted for the display.
+
+    The display mode must be set before the first image is loaded.
+    """
+    def __init__(self, directory, worker=None):
+        self.directory = directory
+        self.worker = worker
+        self.load_times = OrderedDict()
+        self._images = {}
+        self._pending = set()
+
+    def path(self, name):
+        """Return the full path of the asset called name."""
+        return os.path.join(self.directory, name)
+
+    def image(self, name, alpha=False):
+        """Return the image called name, loading it if needed.
+
+        Use alpha for images with transparent parts.
+        """
+        try:
+            return self._images[name]
+        except KeyError:
+            pass
+        start = timer()
+        image = pygame.image.load(self.path(name))
+        return self._add_image(name, image, alpha, timer() - start)
+
+    def _add_image(self, name, image, alpha, seconds):
+        """Convert a loaded image and keep it."""
+        start = timer()
+        if alpha:
+            image = image.convert_alpha()
+        else:
+            image = image.convert()
+        self.load_times[name] = seconds + timer() - start
+        self._images[name] = image
+        return image
+
+    def _load(self, name):
+        """Load an image, on a thread of the IOWorker."""
+        start = timer()
+        image = pygame.image.load(self.path(name))
+        return image, timer() - start
+
+    def prefetch(self, name, alpha=False):
+        """Load the image called name in the background, if there is an
+        IOWorker, so that it is ready when it is needed."""
+        if self.worker is None:
+            self.image(name, alpha)
+            return
+        if name in self._images or name in self._pending:
+            return
+        self._pending.add(name)
+
+        def loaded(result, error):
+            """Keep the loaded image."""
+            self._pending.discard(name)
+            if error is None and name not in self._images:
+                self._add_image(name, result[0], alpha, result[1])
+        self.worker.submit(self._load, (name,), callback=loaded)
+
+    def loaded(self, name):
+        """Return the image called name if it is loaded, else None."""
+        return self._images.get(name)
+
+    def report(self):
+        """Describe how long the assets took to load."""
+        lines = ["%-30s %8.2f ms" % (name, seconds * 1000)
+                 for name, seconds in self.load_times.items()]
+        total = sum(self.load_times.values())
+        lines.append("%-30s %8.2f ms" % ("Total", total * 1000))
+        return "\n".join(lines)
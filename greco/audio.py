@@ -0,0 +1,108 @@
+"""Level up sounds, decoded ahead of time.
+
+Decoding an OGG file takes long enough to stall the game, so the
+sounds for the next few levels are decoded on the threads of an
+IOWorker into pygame.mixer.Sound objects. The decoded sounds are held
+in a cache that is bounded by their size in memory.
+
+"""
+
+import os
+from collections import OrderedDict
+
+import pygame
+
+# There is one sound per level, after that they repeat
+SOUND_COUNT = 63
+
+
+def sound_filename(level):
+    """Return the name of the sound file played on reaching level."""
+    if level > SOUND_COUNT - 1:
+        level = level % (SOUND_COUNT - 1)
+    return str(level).zfill(2) + ".ogg"
+
+
+class AudioManager(object):
+    """Decodes level sounds in the background and plays them.
+
+    The sounds are decoded by worker, an IOWorker, and become
+    available when the game loop drains it. The sounds of the preload
+    levels after the one given to prefetch are decoded ahead of time.
+    Least recently used sounds are dropped once the decoded sounds use
+    more than max_bytes.
+    """
+    def __init__(self, sound_path, worker, preload=3,
+                 max_bytes=16 * 1024 * 1024):
+        self.sound_path = sound_path
+        self.worker = worker
+        self.preload = preload
+        self.max_bytes = max_bytes
+        self._sounds = OrderedDict()
+        self._sizes = {}
+        self._size = 0
+        self._pending = set()
+        self._play_when_decoded = None
+
+    def _get_sound(self, filename):
+        """Return the decoded sound if it is in the cache."""
+        try:
+            sound = self._sounds.pop(filename)
+        except KeyError:
+            return None
+        self._sounds[filename] = sound
+        return sound
+
+    def _add_sound(self, filename, sound):
+        """Add a decoded sound to the cache, dropping old ones to make
+        room."""
+        frequency, size, channels = pygame.mixer.get_init()
+        nbytes = int(sound.get_length() * frequency * channels *
+                     abs(size) // 8)
+        self._sounds[filename] = sound
+        self._sizes[filename] = nbytes
+        self._size += nbytes
+        while self._size > self.max_bytes and len(self._sounds) > 1:
+            old, _ = self._sounds.popitem(last=False)
+            self._size -= self._sizes.pop(old)
+
+    def _decode(self, filename):
+        """Decode a sound, on a thread of the IOWorker."""
+        return pygame.mixer.Sound(os.path.join(self.sound_path, filename))
+
+    def _request(self, filename):
+        """Have a sound decoded, unless it already is or will be."""
+        if filename in self._sounds or filename in self._pending:
+            return
+        self._pending.add(filename)
+
+        def decoded(sound, error):
+            """Keep the decoded sound, and play it if it is wanted."""
+            self._pending.discard(filename)
+            if error is not None:
+                return
+            self._add_sound(filename, sound)
+            if self._play_when_decoded == filename:
+                self._play_when_decoded = None
+                sound.play()
+        self.worker.submit(self._decode, (filename,), callback=decoded)
+
+    def prefetch(self, level):
+        """Decode the sounds for the levels after level."""
+        if not pygame.mixer.get_init():
+            return
+        for next_level in range(level + 1, level + 1 + self.preload):
+            self._request(sound_filename(next_level))
+
+    def play(self, level):
+        """Play the sound for reaching level, or as soon as it is
+        decoded if it is not yet."""
+        if not pygame.mixer.get_init():
+            return
+        filename = sound_filename(level)
+        sound = self._get_sound(filename)
+        if sound is not None:
+            sound.play()
+        else:
+            self._play_when_decoded = filename
+            self._request(filename)
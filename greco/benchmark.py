@@ -0,0 +1,290 @@
+"""Benchmarks of the game, to catch upgrades and changes that slow it.
+
+Runs the game with the dummy SDL video and audio drivers, so it needs
+no display or sound card, times the parts that the player waits for,
+and writes the results as JSON. Given the results of an earlier run,
+it compares against them and reports the benchmarks that got slower.
+
+    python -m greco.benchmark -o baseline.json
+    ... upgrade pygame ...
+    python -m greco.benchmark --baseline baseline.json
+
+Every benchmark is timed in microseconds per operation, lower being
+better. Each run times a batch of calls, so that the timer's own
+resolution and overhead are small next to what is timed, and the
+fastest run is compared, as the slower ones only add the noise of
+whatever else the machine was doing. A benchmark that looks slower is
+run again before it is reported, in case the whole of it was caught
+by a busy moment.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+from timeit import default_timer as timer
+
+# The benchmarks time the game's own internals
+# pylint: disable=protected-access
+
+# How much slower than the baseline a benchmark may get before it is
+# reported, as a fraction
+TOLERANCE = 0.2
+
+# The keystrokes typed in each batch of the input benchmark
+KEYS = 'etaoinshrdlu'
+
+# How many times a benchmark that looks slower is run again
+RETRIES = 2
+
+# How many calls each run of a benchmark times
+BATCHES = {
+    'frame_idle': 200,
+    'frame_full': 10,
+    'input_key': 100,
+    'setup_game': 10,
+}
+
+
+def _percentile(ordered, fraction):
+    """Get a percentile of an ordered list by the nearest rank."""
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def _summarise(times, scale=1):
+    """Summarise run times in seconds as microseconds per operation,
+    where each run did scale operations."""
+    ordered = sorted(time * 1000000 / scale for time in times)
+    return {
+        'min_us': round(ordered[0], 3),
+        'median_us': round(_percentile(ordered, 0.5), 3),
+        'p90_us': round(_percentile(ordered, 0.9), 3),
+        'runs': len(ordered),
+        'operations': scale,
+    }
+
+
+def _time(function, runs, batch=1, scale=1):
+    """Time runs of batch calls of function, each call doing scale
+    operations."""
+    calls = range(batch)
+    times = []
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(runs):
+            start = timer()
+            for _ in calls:
+                function()
+            times.append(timer() - start)
+    finally:
+        if collecting:
+            gc.enable()
+    return _summarise(times, batch * scale)
+
+
+def _close(game):
+    """Shut a game down without waiting for input."""
+    game.worker.close()
+    import pygame
+    pygame.quit()  # pylint: disable=no-member
+
+
+def bench_startup(runs):
+    """Time making a Game, up to the end of its staged start up."""
+    from .game import Game
+    times = []
+    for _ in range(runs):
+        start = timer()
+        game = Game()
+        times.append(timer() - start)
+        _close(game)
+    return _summarise(times)
+
+
+def bench_frames(game, runs):
+    """Time frames where nothing changed and where every panel is
+    redrawn."""
+    idle = _time(game._update_display, runs, BATCHES['frame_idle'])
+
+    def redraw():
+        """Draw a frame with every panel redrawn."""
+        game._invalidate()
+        game._update_display()
+    full = _time(redraw, runs, BATCHES['frame_full'])
+    return {'frame_idle': idle, 'frame_full': full}
+
+
+def bench_input(game, runs):
+    """Time the text box taking batches of key presses, per key."""
+    import pygame
+    from pygame.locals import KEYDOWN, K_BACKSPACE
+    batch = [pygame.event.Event(KEYDOWN, key=ord(key), unicode=key, mod=0)
+             for key in KEYS]
+    batch += [pygame.event.Event(KEYDOWN, key=K_BACKSPACE, unicode='',
+                                 mod=0)] * len(KEYS)
+    text_box = game.text_box
+    return {'input_key': _time(lambda: text_box.update(batch), runs,
+                               BATCHES['input_key'], len(batch))}
+
+
+def bench_leds(game, runs):
+    """Time showing each target of a level, with the grids already
+    parsed and not."""
+    from .gridcache import GridCache
+    words = game.engine.get_level_words(game.info['level'])[:50]
+
+    def show_targets():
+        """Show every target."""
+        for word in words:
+            game._update_leds(message=word)
+    warm = _time(show_targets, runs, scale=len(words))
+    grids = game.grids
+
+    def show_new_targets():
+        """Show every target with nothing parsed yet."""
+        game.grids = GridCache(game.gcode)
+        show_targets()
+    cold = _time(show_new_targets, runs, scale=len(words))
+    game.grids = grids
+    return {'update_leds': warm, 'update_leds_cold': cold}
+
+
+def bench_setup_game(game, runs):
+    """Time loading the level corpus and getting the first levels
+    ready."""
+    from .engine import Engine
+    from .gridcache import GridCache
+    engine, grids = game.engine, game.grids
+
+    def setup():
+        """Get a new game's levels ready."""
+        game.engine = Engine()
+        game.grids = GridCache(game.gcode)
+        game._setup_game()
+    result = _time(setup, runs, BATCHES['setup_game'])
+    game.engine, game.grids = engine, grids
+    return {'setup_game': result}
+
+
+# The benchmarks of a running game, and the results each of them gives
+GAME_BENCHMARKS = (
+    (bench_frames, ('frame_idle', 'frame_full')),
+    (bench_input, ('input_key',)),
+    (bench_leds, ('update_leds', 'update_leds_cold')),
+    (bench_setup_game, ('setup_game',)),
+)
+
+
+def run(runs=50, names=None):
+    """Run the benchmarks giving the results called names, or all of
+    them, and return their results."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    import greencode
+    from .game import Game, CLOCK_EVENT
+
+    results = {}
+    if names is None or 'startup' in names:
+        results['startup'] = bench_startup(runs)
+    game = Game(event_driven=True)
+    try:
+        for benchmark, produced in GAME_BENCHMARKS:
+            if names is None or set(produced) & set(names):
+                results.update(benchmark(game, runs))
+    finally:
+        pygame.time.set_timer(CLOCK_EVENT, 0)
+        _close(game)
+    return {
+        'versions': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'greencode': getattr(greencode, '__version__', None),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Compare results with baseline. Return a line for each
+    benchmark, and the names of those that got slower by more than
+    tolerance."""
+    lines = []
+    slower = []
+    for name, result in sorted(results['results'].items()):
+        old = baseline['results'].get(name)
+        best = result['min_us']
+        if old is None:
+            lines.append('%-20s %12.3f us   (new)' % (name, best))
+            continue
+        ratio = best / old['min_us']
+        flag = ''
+        if ratio > 1 + tolerance:
+            flag = '  SLOWER'
+            slower.append(name)
+        lines.append('%-20s %12.3f us %7.2fx%s' % (
+            name, best, ratio, flag))
+    return lines, slower
+
+
+def main(argv=None):
+    """Benchmark the game, and compare with a baseline."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--runs', type=int, default=50,
+                        help='times to run each benchmark')
+    parser.add_argument('--baseline', metavar='FILE',
+                        help='results of an earlier run to compare with')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='how much slower, as a fraction, is allowed '
+                        '(default %s)' % TOLERANCE)
+    parser.add_argument('-o', '--output', help='file to write the results '
+                        'to (default: standard output)')
+    args = parser.parse_args(argv)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if not all('min_us' in result
+                   for result in baseline['results'].values()):
+            parser.error('%s was made by an older benchmark, make it again'
+                         % args.baseline)
+
+    results = run(args.runs)
+    if args.baseline:
+        lines, slower = compare(results, baseline, args.tolerance)
+        for _ in range(RETRIES):
+            if not slower:
+                break
+            again = run(args.runs, slower)['results']
+            for name in slower:
+                if (again[name]['min_us'] <
+                        results['results'][name]['min_us']):
+                    results['results'][name] = again[name]
+            lines, slower = compare(results, baseline, args.tolerance)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=1, sort_keys=True)
+            output.write('\n')
+    else:
+        json.dump(results, sys.stdout, indent=1, sort_keys=True)
+        sys.stdout.write('\n')
+
+    if args.baseline:
+        for line in lines:
+            print(line, file=sys.stderr)
+        if slower:
+            print('%d benchmarks got slower: %s' % (
+                len(slower), ', '.join(slower)), file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""The rules of the game, without any display.
+
+The Engine holds the player's progress and decides what happens when
+a guess is submitted. It does not use pygame or a clock of its own:
+every action is given the time it happened at, in seconds, so a
+session can be driven by the real game, by a script, or by a
+simulation running much faster than real time.
+
+    engine = Engine(LevelIndex(load_levels(), LETTERS), seed=1)
+    results = engine.run([(1.5, 'e'), (2.0, '\\n')])
+
+"""
+
+from __future__ import division
+
+import random
+from collections import namedtuple
+
+from .adaptive import AdaptiveScheduler
+from .levels import LevelIndex, load_levels
+from .scoring import score_guess
+from .stats import Analytics, RollingStat
+
+STARTING_LEVEL = 0
+
+LETTERS = "etaoinshrdlcumwfgypbvkj0123456789etaoinshrdlcumwfgypbvkjxqz"
+
+# Words longer than this do not fit on one line of the grid
+MAX_WORD_LENGTH = 8
+
+# The most characters that can be typed in as a guess
+MAX_GUESS_LENGTH = 16
+
+# How many recent guesses the statistics are kept for
+WPM_WINDOW = 100
+ACCURACY_WINDOW = 10
+
+# Keystrokes in scripts that are not typed characters
+BACKSPACE = '\b'
+SUBMIT = '\n'
+
+# What happened when a guess was submitted, seconds being how long the
+# guess took
+Result = namedtuple(
+    'Result',
+    ('target', 'guess', 'accuracy', 'wpm', 'level_up', 'confusions',
+     'seconds'))
+
+
+class Engine(object):
+    """The state of one player's game.
+
+    The words of each level are given by levels, a LevelIndex. If it
+    is not given, the corpus that comes with the game is loaded the
+    first time it is needed.
+
+    With adaptive, targets are chosen to practise the characters the
+    player gets wrong or is slow at, instead of uniformly.
+    """
+    def __init__(self, levels=None, seed=None, adaptive=False):
+        self._levels = levels
+        self.random = random.Random(seed)
+        self.info = {}
+        self.current_target = 'e'
+        self.value = ''
+        self.started = 0.0
+        self.analytics = Analytics()
+        self.scheduler = AdaptiveScheduler() if adaptive else None
+        self.setup_info()
+
+    @property
+    def levels(self):
+        """The index of the words of each level."""
+        if self._levels is None:
+            self._levels = LevelIndex(load_levels(), LETTERS)
+        return self._levels
+
+    def setup_info(self):
+        """Setup the player info dictionary with initial data."""
+        self.info = {
+            "wpm": RollingStat(WPM_WINDOW, [1]),
+            "level": STARTING_LEVEL,
+            "average_wpm": 10,
+            "accuracy": RollingStat(ACCURACY_WINDOW, [90]),
+            "key_char": 'e',
+        }
+
+    @staticmethod
+    def _get_limits(level):
+        """Get the longest word and how much of the alphabet can be
+        used in targets at level."""
+        # At lower levels, only use words that fit on one line
+        max_length = MAX_WORD_LENGTH if level < 59 else None
+        return max_length, level + 1
+
+    def get_level_words(self, level):
+        """Get the words that can be used as targets at level."""
+        return self.levels.pool(level, *self._get_limits(level))
+
+    def get_elapsed(self, timestamp):
+        """Get how long the current target has been shown for."""
+        return max(timestamp - self.started, 0)
+
+    def press(self, character):
+        """Type a character of the guess."""
+        if len(self.value) < MAX_GUESS_LENGTH:
+            self.value += character
+
+    def backspace(self):
+        """Delete the last character of the guess."""
+        self.value = self.value[:-1]
+
+    def submit(self, timestamp, guess=None):
+        """Mark a guess, by default the one typed in, at timestamp and
+        move on to a new target."""
+        if guess is None:
+            guess = self.value
+        self.value = ""
+        result = self.apply(self.current_target, guess,
+                            self.get_elapsed(timestamp))
+        self.new_target(timestamp)
+        return result
+
+    def apply(self, target, guess, seconds):
+        """Score a guess of target that took seconds, and update the
+        statistics and level. Used by submit, and to replay guesses
+        that were saved."""
+        score = score_guess(target, guess)
+        self.info['accuracy'].append(score.accuracy)
+        self.analytics.record(target, score.confusions)
+        if self.scheduler is not None:
+            self.scheduler.record(target, score.confusions, seconds)
+        wpm = self._set_words_per_minute(seconds)
+        level_up = (self.info['accuracy'].count > 10 and
+                    self.get_average_accuracy() > 89)
+        if level_up:
+            self.upgrade_level()
+        return Result(target, guess, score.accuracy, wpm, level_up,
+                      score.confusions, seconds)
+
+    def new_target(self, timestamp):
+        """Get a new word for the user to type."""
+        self.started = timestamp
+        level = self.info['level']
+        if self.scheduler is not None:
+            index = self.levels.character_index(
+                level, *self._get_limits(level))
+            self.current_target = self.scheduler.choose(index, self.random)
+        else:
+            self.current_target = self.random.choice(
+                self.get_level_words(level))
+
+    def _set_words_per_minute(self, seconds, words=1):
+        """Update words per minute."""
+        # A guess can not be submitted in no time at all, but keep
+        # scripts with equal timestamps from dividing by zero.
+        seconds = max(seconds, 0.001)
+        wpm = round((60 / seconds) * words)
+        self.info['wpm'].append(wpm)
+        return wpm
+
+    def get_average_accuracy(self):
+        """Get the accuracy from the last ten guesses."""
+        return round(self.info['accuracy'].mean)
+
+    def upgrade_level(self):
+        """Move up to the next level."""
+        self.info['accuracy'].clear([self.get_average_accuracy()])
+        self.info['level'] += 1
+        if self.info['level'] < 59:
+            self.info["key_char"] = LETTERS[self.info['level']]
+
+    def get_analytics(self):
+        """Get the percentiles and trends of the recent words per
+        minute and accuracy, the error rate of each character and how
+        often each character was confused with another."""
+        return {
+            'wpm': self.analytics.summarise('wpm', self.info['wpm']),
+            'accuracy': self.analytics.summarise(
+                'accuracy', self.info['accuracy']),
+            'error_rates': self.analytics.error_rates(),
+            'confusions': dict(self.analytics.confusions),
+        }
+
+    def get_state(self):
+        """Get the player's progress as plain data that can be saved
+        as JSON."""
+        return {
+            'level': self.info['level'],
+            'average_wpm': self.info['average_wpm'],
+            'key_char': self.info['key_char'],
+            'wpm': self.info['wpm'].get_state(),
+            'accuracy': self.info['accuracy'].get_state(),
+            'analytics': self.analytics.get_state(),
+            'scheduler': (self.scheduler.get_state()
+                          if self.scheduler is not None else None),
+        }
+
+    def set_state(self, state):
+        """Carry on from progress that was got by get_state."""
+        self.setup_info()
+        for name in ('level', 'average_wpm', 'key_char'):
+            self.info[name] = state[name]
+        self.info['wpm'].set_state(state['wpm'])
+        self.info['accuracy'].set_state(state['accuracy'])
+        self.analytics.set_state(state['analytics'])
+        if self.scheduler is not None and state.get('scheduler'):
+            self.scheduler.set_state(state['scheduler'])
+
+    def run(self, keystrokes):
+        """Play a script of (timestamp, keystroke) pairs, where a
+        keystroke is a character, BACKSPACE or SUBMIT. Return the
+        results of the submitted guesses."""
+        results = []
+        for timestamp, keystroke in keystrokes:
+            if keystroke == SUBMIT:
+                results.append(self.submit(timestamp))
+            elif keystroke == BACKSPACE:
+                self.backspace()
+            else:
+                self.press(keystroke)
+        return results
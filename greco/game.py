@@ -0,0 +1,825 @@
+"""The game itself, shown and played with pygame.
+
+The rules live in the engine module, this module draws the game and
+turns the player's key presses into engine actions.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+
+try:
+    from time import monotonic
+except ImportError:
+    # Python 2
+    from time import time as monotonic
+
+# Use SDL2 Pygame if available, SD1 if not.
+try:
+    import pygame_sdl2
+except ImportError:
+    SDL = 1
+else:
+    pygame_sdl2.import_as_pygame()
+    SDL = 2
+
+import pygame
+# pylint: disable=no-member,no-name-in-module
+from pygame.locals import (QUIT, KEYDOWN, K_RETURN, K_PAUSE,
+                           K_HELP, K_INSERT, K_ESCAPE, K_F3, USEREVENT,
+                           VIDEOEXPOSE)
+
+from ledgrid import LEDGrid, LED
+from greencode import GreenCode, WHITE, OFF
+
+from .eztext import Input
+from .textcache import TextCache
+from .gridcache import GridCache
+from .gridpack import load_grid_pack
+from .audio import AudioManager
+from .assets import AssetRegistry
+from .ioworker import IOWorker
+from .ledsprites import LEDSprites
+from .keylog import KeyLogReader, KeyRecorder
+from .profiler import FrameProfiler, StartupProfile
+from .engine import Engine, BACKSPACE, MAX_GUESS_LENGTH, SUBMIT
+from .store import SessionStore
+
+PAUSE_BUTTONS = (K_PAUSE, K_HELP, K_INSERT, K_ESCAPE)
+
+# Shows and hides the frame times, starting the frame profiler if it
+# is not running yet
+OVERLAY_KEY = K_F3
+
+# How often the frame times shown are brought up to date, in seconds
+OVERLAY_INTERVAL = 0.5
+
+TITLE = 'Greco - Green Code Learning Game'
+
+TEAPOT = "dotty-tea-pot.png"
+
+# The game clock advances in fixed steps of TICK seconds, however
+# often the screen is drawn, and shows the time of its latest step. If
+# the game falls further behind than MAX_TICKS_BEHIND steps it skips
+# ahead rather than catching up.
+TICK = 1 / 60
+MAX_TICKS_BEHIND = 60
+
+# The screen is drawn at FRAME_RATE while the player is typing, and
+# drops to IDLE_FRAME_RATE once there has been no input for IDLE_AFTER
+# seconds, which is still often enough for the clock.
+FRAME_RATE = 60
+IDLE_FRAME_RATE = 5
+IDLE_AFTER = 1.0
+
+# In event driven mode, the game sleeps until there is input or this
+# timer goes off for the clock to show the next second
+CLOCK_EVENT = USEREVENT + 1
+
+# Posted to wake up the game when a background load has finished
+IO_EVENT = USEREVENT + 2
+
+# The screen is split into panels that are redrawn independently,
+# only when something in them has changed. Together they cover the
+# whole screen.
+PANELS = (
+    ("headings", (0, 0, 366, 40)),
+    ("leds", (0, 40, 366, 365)),
+    ("side", (366, 0, 274, 185)),
+    ("clock", (366, 185, 274, 90)),
+    ("key", (640, 0, 60, 275)),
+    ("input", (366, 275, 334, 130)),
+)
+
+
+class Game(object):  # pylint: disable=too-many-instance-attributes
+    """The main game class.
+
+    The game state is kept by engine, a new Engine if none is given.
+    If event_driven, the game blocks waiting for input instead of
+    drawing frames, and redraws only when something has changed. If
+    store is given, every guess is saved to it.
+
+    The welcome screen is shown as soon as the display is ready, and
+    the rest is set up behind it. The stages are timed by profile. The
+    frames are timed by profiler, a FrameProfiler, if one is given.
+
+    The keystrokes are recorded by recorder, a KeyRecorder, if one is
+    given. If replay is given, an iterable of (game time, keystroke)
+    pairs such as a KeyLogReader, the keystrokes are typed from it at
+    the pace they were recorded at, instead of from the keyboard.
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, engine=None, event_driven=False, store=None,
+                 profile=None, profiler=None, recorder=None, replay=None):
+        self.finished = 0
+        self.paused = False
+        self.text_box = None
+        self.background = None
+        self.clock = None
+        self.engine = engine or Engine()
+        self.ticks = 0
+        self._epoch = monotonic()
+        self._paused_for = 0.0
+        self._last_input = 0.0
+        self.store = store
+        self.profiler = profiler
+        self.recorder = recorder
+        self.replay = iter(replay) if replay is not None else None
+        self._next_keystroke = None
+        self._overlay = False
+        self._overlay_due = 0.0
+        self.key = []
+        self.fonts = {}
+        self.event_driven = event_driven
+        self.worker = IOWorker(notify=self._wake if event_driven else None)
+        self.assets = AssetRegistry(os.path.split(__file__)[0], self.worker)
+        self.text_cache = TextCache()
+        self.panels = []
+        self._dirty = set()
+        self._clock_text = None
+        self.gcode = GreenCode()
+        self.grids = GridCache(self.gcode)
+        self.sprites = LEDSprites()
+        self._sound_path = self.assets.path("sounds")
+        self.audio = AudioManager(self._sound_path, self.worker)
+        self.profile = profile or StartupProfile()
+        with self.profile.stage("display"):
+            self._setup_ui()
+        with self.profile.stage("welcome"):
+            self._draw_welcome()
+        self.profile.mark_first_frame()
+        with self.profile.stage("levels"):
+            self._setup_game()
+            self._setup_key()
+            self._update_key()
+            self._update_leds()
+        with self.profile.stage("text entry"):
+            self._setup_text_entry()
+        with self.profile.stage("sound"):
+            self._setup_sound()
+        with self.profile.stage("images"):
+            self.assets.prefetch(TEAPOT, alpha=True)
+
+    def run_game(self):
+        """The main game loop."""
+        self._welcome()
+
+        while self.finished == 0:
+            events = self._get_events()
+            if events:
+                self._last_input = self._get_time()
+            for event in events:
+                if event.type == QUIT:
+                    self._quit()
+                elif event.type == KEYDOWN:
+                    if event.key == K_RETURN and self.replay is None:
+                        self._mark_user_translation()
+                    if event.key in PAUSE_BUTTONS:
+                        self._pause()
+                    if event.key == OVERLAY_KEY:
+                        self._toggle_overlay()
+                elif event.type == VIDEOEXPOSE:
+                    self._invalidate()
+
+            if self.finished:
+                break
+            if self.replay is not None:
+                self._type_replay()
+            else:
+                value = self.text_box.value
+                self.text_box.update(events)
+                if self.text_box.value != value:
+                    self._invalidate("input")
+                    if self.recorder is not None:
+                        self._record_edit(value, self.text_box.value)
+            self._update_display()
+
+    def _record_edit(self, old, new):
+        """Record the keystrokes that changed the guess from old to
+        new."""
+        timestamp = self._get_time()
+        common = 0
+        for old_char, new_char in zip(old, new):
+            if old_char != new_char:
+                break
+            common += 1
+        for _ in range(len(old) - common):
+            self.recorder.backspace(timestamp)
+        for character in new[common:]:
+            self.recorder.press(timestamp, character)
+
+    def _type_replay(self):
+        """Type the replayed keystrokes that are due."""
+        now = self._get_time()
+        while True:
+            if self._next_keystroke is None:
+                self._next_keystroke = next(self.replay, None)
+                if self._next_keystroke is None:
+                    # The end of the replay, the player can take over
+                    self.replay = None
+                    return
+            timestamp, keystroke = self._next_keystroke
+            if timestamp > now:
+                return
+            self._next_keystroke = None
+            if keystroke == SUBMIT:
+                self._mark_user_translation(timestamp)
+                if self.finished:
+                    return
+            elif keystroke == BACKSPACE:
+                self.text_box.value = self.text_box.value[:-1]
+            elif len(self.text_box.value) < MAX_GUESS_LENGTH:
+                self.text_box.value += keystroke
+            self._invalidate("input")
+
+    def _quit(self):
+        """Finish the game."""
+        self.finished = 1
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.store is not None:
+            self.store.close()
+        self.worker.close()
+        pygame.quit()  # pylint: disable=no-member
+
+    @staticmethod
+    def _wake():
+        """Wake up the game loop, from a background thread."""
+        try:
+            pygame.event.post(pygame.event.Event(IO_EVENT))
+        except pygame.error:
+            # The game has finished
+            pass
+
+    def _get_events(self):
+        """Get the waiting events. In event driven mode, sleep until
+        there is at least one."""
+        if self.event_driven:
+            return [pygame.event.wait()] + pygame.event.get()
+        return pygame.event.get()
+
+    @property
+    def info(self):
+        """The player info dictionary."""
+        return self.engine.info
+
+    @property
+    def levels(self):
+        """The index of the words of each level."""
+        return self.engine.levels
+
+    def _setup_game(self):
+        """Get the words of the first levels ready."""
+        if self.grids.pack is None:
+            self.grids.pack = load_grid_pack(self.levels.corpus)
+        self._prepare_level(self.info['level'])
+        self._prepare_level(self.info['level'] + 1)
+
+    def _prepare_level(self, level):
+        """Index the words of level and get their grids."""
+        self.grids.warm(self.engine.get_level_words(level))
+
+    def _setup_ui(self):
+        """Set up what is needed to show the welcome screen."""
+        pygame.display.init()
+        pygame.font.init()
+        self._setup_fonts()
+        pygame.display.set_caption(TITLE)
+        self.screen = pygame.display.set_mode((700, 405), 0, 32)
+        # pylint: disable=too-many-function-args
+        background = pygame.Surface(self.screen.get_size())
+        self.background = background.convert()
+        self.background.fill((0, 51, 25))
+        self.grid = LEDGrid(screen=self.screen, margins=(10, 40))
+        # pylint: disable=protected-access
+        self._grid_leds = [self.grid._leds[self.grid._rotate(index)]
+                           for index in range(64)]
+        self._setup_panels()
+        self.clock = pygame.time.Clock()
+
+    def _setup_sound(self):
+        """Start the mixer and decode the first level up sounds."""
+        try:
+            pygame.mixer.init()
+        except pygame.error:
+            # No sound then
+            return
+        self.audio.prefetch(self.info['level'])
+
+    def _setup_panels(self):
+        """Set up the screen panels and mark them all for drawing."""
+        drawers = {
+            "headings": self._draw_top_headings,
+            "leds": self._draw_leds,
+            "side": self._draw_side_info,
+            "clock": self._draw_clock,
+            "key": self._draw_key,
+            "input": self._draw_text_box,
+        }
+        self.panels = [(name, pygame.Rect(rect), drawers[name])
+                       for name, rect in PANELS]
+        self._invalidate()
+
+    def _invalidate(self, *names):
+        """Mark panels as needing a redraw, or all panels if none given."""
+        if names:
+            self._dirty.update(names)
+        else:
+            self._dirty.update(name for name, _, _ in self.panels)
+
+    def _setup_fonts(self):
+        """Set the font sizes."""
+        small = 12 if SDL == 2 else 20
+        medium = 30 if SDL == 2 else 50
+        key = 60 if SDL == 2 else 100
+
+        self.fonts = {
+            "small": pygame.font.Font(None, small),
+            "medium": pygame.font.Font(None, medium),
+            "key": pygame.font.Font(None, key)
+        }
+        self.text_cache.invalidate()
+
+    # pylint: disable=too-many-arguments
+    def _write_text(self,
+                    text,
+                    x_pos,
+                    y_pos,
+                    font="small",
+                    colour=WHITE):
+        """Friendly method to write text such as headings, scores etc."""
+        font = self.fonts[font]
+        text_surface = self.text_cache.render(font, text, colour)
+        self.screen.blit(text_surface, (x_pos, y_pos))
+
+    def _welcome(self):
+        """Wait on the welcome screen."""
+        self.paused = True
+        self._do_pause()
+        if self.finished:
+            return
+        self.screen.fill(OFF)
+        self._update_leds()
+        # Draw the game, which in event driven mode also sets the clock
+        # timer that the pause turned off
+        self._update_display()
+
+    def _draw_welcome(self):
+        """Draw the welcome screen."""
+        self.screen.fill(OFF)
+        self._draw_top_headings()
+        self._update_leds(message="welcome friend")
+        self._draw_leds()
+
+        self._write_text(
+            'Welcome',
+            370, 10, "key")
+        self._write_text(
+            "Learn Green Code in a friendly way!",
+            400, 75)
+        self._write_text(
+            "How To Play",
+            370, 95, "medium")
+        self._write_text(
+            "Read the Green Code and type it in.",
+            370, 135)
+        self._write_text(
+            "Use the Backspace key to delete typos.",
+            370, 155)
+        self._write_text(
+            "Return key to submit your guess.",
+            370, 175)
+        self._write_text(
+            "ESC key to pause the game.",
+            370, 195)
+        self._write_text(
+            "Consistently accurate typing will result in gaining",
+            370, 215)
+        self._write_text(
+            "a level and being rewarded with a silly catchphrase.",
+            370, 235)
+        self._write_text(
+            "Each level will focus on a different character,",
+            370, 255)
+        self._write_text(
+            "which is shown by a helpful key on the far right.",
+            370, 275)
+        self._write_text(
+            "Green Code is a whimsical language so start slowly,",
+            370, 310)
+        self._write_text(
+            "don't take it seriously and don't forget to have fun!",
+            370, 330)
+        self._write_text(
+            "Press Return to join the RGB LED Revolution!",
+            370, 360)
+        pygame.display.update()
+
+    def _wrong(self, guess, target):
+        """Show the correct answer."""
+        self.paused = True
+        self.screen.fill(OFF)
+        self._draw_top_headings()
+
+        self._write_text('You wrote:', 370, 15)
+
+        if len(guess) < 8:
+            self._write_text(guess, 370, 40, "medium")
+        else:
+            self._write_text(guess[:8], 370, 40, "medium")
+            self._write_text(guess[8:], 370, 80, "medium")
+
+        self._write_text('Correct Answer:', 370, 140)
+
+        if len(target) < 8:
+            self._write_text(target, 370, 165, "medium")
+        else:
+            self._write_text(target[:8], 370, 165, "medium")
+            self._write_text(target[8:], 370, 205, "medium")
+
+        self._draw_leds()
+        self._do_pause()
+
+    def _pause(self):
+        """Pause the game for a tea break."""
+        self.paused = True
+        self.screen.fill(OFF)
+        self._draw_top_headings()
+        self._update_leds(message="paused")
+        self._draw_leds()
+        self._write_text("Paused", 400, 250, "key")
+        teapot = self.assets.loaded(TEAPOT)
+        if teapot is not None:
+            self.screen.blit(teapot, (400, 50))
+        self._do_pause()
+        self._update_leds()
+
+    def _do_pause(self):
+        """Wait for the game to be resumed."""
+        paused_at = monotonic()
+        # The pause screen does not change until the game is resumed
+        pygame.time.set_timer(CLOCK_EVENT, 0)
+        pygame.display.update()
+        while self.paused:
+            self.worker.drain()
+            for event in self._get_events():
+                if event.type == pygame.QUIT:
+                    self._quit()
+
+                if event.type == KEYDOWN:
+                    if event.key == K_RETURN:
+                        self._unpause()
+                    if event.key in PAUSE_BUTTONS:
+                        self._unpause()
+                if event.type == VIDEOEXPOSE:
+                    pygame.display.update()
+
+            if self.finished:
+                return
+            if not self.event_driven:
+                self.clock.tick(15)
+
+        # The game clock stands still while paused
+        self._paused_for += monotonic() - paused_at
+        # The pause screens draw over everything
+        self._invalidate()
+
+    def _unpause(self):
+        """Make the fun continue!"""
+        self.paused = False
+
+    def _setup_text_entry(self):
+        """Setup the text entry field."""
+        if SDL == 2:
+            font = pygame.font.Font(None, 19)
+        else:
+            font = pygame.font.Font(None, 30)
+
+        self.text_box = Input(
+            x=370,
+            y=300,
+            maxlength=MAX_GUESS_LENGTH,
+            color=(255, 0, 0),
+            prompt='',
+            font=font,
+            cache=self.text_cache)
+        self.text_box.draw(self.screen)
+
+    def _play_sound(self):
+        """Play the level change silly noise."""
+        level = self.info['level']
+        self.audio.play(level)
+        self.audio.prefetch(level)
+
+    @property
+    def current_target(self):
+        """I'm the 'current_target' property."""
+        return self.engine.current_target
+
+    @current_target.setter
+    def current_target(self, value):
+        self.engine.current_target = value
+        self._update_leds()
+
+    def _update_leds(self,
+                     message=None):
+        """Set the LED colours."""
+        if not message:
+            message = self.engine.current_target
+        # Get the message
+        grid = self.grids.message(message)
+        # Display the message
+        self._set_pixels(grid)
+        self._invalidate("leds")
+
+    def _set_pixels(self, grid):
+        """Set the colours of the LEDs from a grid.
+
+        Unlike LEDGrid.set_pixels, this does not check the grid, which
+        comes from Green Code and so is always valid, and does not draw
+        the LEDs straight away; the LED panel is redrawn with the next
+        frame.
+        """
+        # pylint: disable=protected-access
+        self.grid._pixels = grid
+        for led, colour in zip(self._grid_leds, grid):
+            led.colour = colour
+
+    def _setup_key(self):
+        """Setup the helpful key."""
+        for row in range(0, 4):
+            led = LED(radius=20,
+                      pos=(14, row))
+            self.key.append(led)
+
+    def _update_key(self):
+        """Update the helpful key."""
+        grid = self.grids.character(self.info["key_char"])
+        for index, led in enumerate(self.key):
+            if grid[index] == OFF:
+                led.lit = False
+            else:
+                led.clicked(grid[index])
+                led.lit = True
+        self._invalidate("key")
+
+    def _draw_top_headings(self):
+        """Draw the top headings."""
+        # Title
+        self._write_text(TITLE, 100, 15, "small")
+
+        # Level
+        level = 'Level ' + str(self.info['level'])
+        self._write_text(level, 5, 15, "small")
+
+    def _draw_side_info(self):
+        """Draw the side headings."""
+        # Last words per minute
+        self._write_text('Last WPM:', 370, 15)
+
+        # Last words per minute number
+        wpm = "%.0f" % self.info['wpm'][-1]
+        self._write_text(wpm, 370, 30, "key")
+
+        # Average Words per minute
+        self._write_text('Average WPM:', 520, 15)
+
+        # Average words per minute number
+        awpm = "%.0f" % self.info['wpm'].total_mean
+        self._write_text(awpm, 525, 30, "key")
+
+        # Accuracy
+        self._write_text('Accuracy:', 370, 100,)
+
+        # Accuracy percentage
+        apc = "%.0f" % self.engine.get_average_accuracy()
+        self._write_text(apc + '%', 370, 115, "key")
+
+        # Last character title
+        self._write_text('Last char added:', 520, 100)
+
+        # Last character key char
+        self._write_text(self.info['key_char'], 560, 115, "key")
+
+    def _draw_text_box(self):
+        """Draw the text input box."""
+        # Your Guess
+        self._write_text('Your input:', 370, 275)
+        self.text_box.draw(self.screen)
+        if self._overlay:
+            self._draw_overlay()
+
+    def _toggle_overlay(self):
+        """Show or hide the frame times."""
+        if self.profiler is None:
+            self.profiler = FrameProfiler()
+        self._overlay = not self._overlay
+        self._overlay_due = 0.0
+        self._invalidate("input")
+
+    def _draw_overlay(self):
+        """Draw the frame times under the text input box."""
+        for index, line in enumerate(self.profiler.report_lines()):
+            self._write_text(line, 370, 335 + 15 * index)
+
+    def _get_time(self):
+        """Get the game time in seconds, which only passes while the
+        game is being played."""
+        return monotonic() - self._epoch - self._paused_for
+
+    def _get_clock_text(self, timestamp):
+        """Format how much time the current reading has taken at
+        timestamp."""
+        total_seconds = int(self.engine.get_elapsed(timestamp))
+
+        # Divide by 60 to get total minutes
+        minutes = total_seconds // 60
+
+        # Use modulus (remainder) to get seconds
+        seconds = total_seconds % 60
+
+        # Use python string formatting to format in leading zeros
+        return "{0:02}:{1:02}".format(minutes, seconds)
+
+    def _draw_clock(self):
+        """Draw how much time the current reading has taken."""
+        # Time
+        self._write_text('Time:', 370, 185)
+        self._write_text(self._get_clock_text(self.ticks * TICK),
+                         370, 200, "key")
+
+    def _tick_clock(self):
+        """Step the clock to the time of the current tick, and redraw it
+        when its digits change."""
+        clock_text = self._get_clock_text(self.ticks * TICK)
+        if clock_text != self._clock_text:
+            self._clock_text = clock_text
+            self._invalidate("clock")
+
+    def _advance(self):
+        """Run the fixed steps of game time that have passed since the
+        last frame."""
+        due = int(self._get_time() / TICK)
+        if due - self.ticks > MAX_TICKS_BEHIND:
+            self.ticks = due - MAX_TICKS_BEHIND
+        while self.ticks < due:
+            self.ticks += 1
+            self._tick_clock()
+
+    def _get_frame_rate(self):
+        """Draw often while the player is typing, and rarely when idle."""
+        if self._get_time() - self._last_input < IDLE_AFTER:
+            return FRAME_RATE
+        return IDLE_FRAME_RATE
+
+    def _draw_leds(self, leds=None):
+        """Draw the LEDS."""
+        if not leds:
+            leds = self._grid_leds
+        self.sprites.draw(self.screen, leds)
+
+    def _draw_key(self):
+        """Draw the key for the last character added."""
+        self.sprites.draw(self.screen, self.key)
+
+    def _update_display(self):
+        """Update the display while the game is running, then wait
+        for the next frame."""
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start_frame()
+        self.worker.drain()
+        self._advance()
+        if self._overlay and self._get_time() >= self._overlay_due:
+            self._overlay_due = self._get_time() + OVERLAY_INTERVAL
+            self._invalidate("input")
+        if profiler is not None:
+            profiler.lap("io and clock")
+        self._redraw_panels()
+        if profiler is not None:
+            profiler.end_frame()
+        if self.event_driven:
+            self._set_clock_timer()
+        else:
+            self.clock.tick(self._get_frame_rate())
+
+    def _set_clock_timer(self):
+        """Wake up when the clock is next due to show a new second,
+        which is the first tick after the second has passed."""
+        elapsed = self.engine.get_elapsed(self._get_time())
+        delay = int((1 - elapsed % 1 + TICK) * 1000) + 1
+        pygame.time.set_timer(CLOCK_EVENT, delay)
+
+    def _redraw_panels(self):
+        """Redraw the changed panels and push only their rects to the
+        display."""
+        if not self._dirty:
+            return
+        profiler = self.profiler
+        rects = []
+        for name, rect, draw in self.panels:
+            if name in self._dirty:
+                self.screen.set_clip(rect)
+                self.screen.blit(self.background, rect, rect)
+                draw()
+                rects.append(rect)
+                if profiler is not None:
+                    profiler.lap(name)
+        self.screen.set_clip(None)
+        self._dirty.clear()
+        pygame.display.update(rects)
+        if profiler is not None:
+            profiler.lap("update")
+
+    def _upgrade_level(self):
+        """Show and play the move up to a new level."""
+        self._update_key()
+        self._invalidate("headings", "side")
+        self._redraw_panels()
+        self._play_sound()
+        # Get the words of the following level ready
+        self._prepare_level(self.info['level'] + 1)
+
+    def _mark_user_translation(self, timestamp=None):
+        """Update the user's guess, submitted at timestamp, by default
+        now."""
+        if timestamp is None:
+            timestamp = self._get_time()
+        if self.recorder is not None:
+            self.recorder.submit(timestamp)
+        result = self.engine.submit(timestamp, self.text_box.value)
+        if self.store is not None:
+            self.store.record(result)
+        if result.guess != result.target:
+            self._wrong(result.guess, result.target)
+            if self.finished:
+                return
+        self.text_box.value = ""
+        self._invalidate("side", "input")
+        if result.level_up:
+            self._upgrade_level()
+        self._update_leds()
+
+
+def main(argv=None, profile=None):
+    """Run the game when the module is executed. profile is the
+    StartupProfile to carry on timing the start up with."""
+    parser = argparse.ArgumentParser(description='Learn the Green Code.')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='choose words to practise the characters '
+                        'you get wrong or are slow at')
+    parser.add_argument('--event-driven', action='store_true',
+                        help='sleep until there is input instead of '
+                        'drawing frames, to save CPU on shared machines')
+    parser.add_argument('--session', metavar='DIRECTORY',
+                        help='save your progress in DIRECTORY, and carry '
+                        'on from the progress saved there')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='print how long each stage of starting up '
+                        'took')
+    parser.add_argument('--profile-frames', metavar='FILE',
+                        help='time the drawing of each frame and write '
+                        'the times to FILE on quitting, as CSV if it ends '
+                        'with .csv, otherwise JSON (F3 shows them)')
+    parser.add_argument('--record', metavar='FILE',
+                        help='record your keystrokes to FILE')
+    parser.add_argument('--replay', metavar='FILE',
+                        help='play the keystrokes recorded in FILE again, '
+                        'at the pace they were typed')
+    args = parser.parse_args(argv)
+    if args.replay and args.session:
+        parser.error('a replay can not carry on a saved session')
+    profile = profile or StartupProfile()
+    replay = None
+    if args.replay:
+        replay = KeyLogReader(args.replay)
+        engine = replay.make_engine()
+    else:
+        engine = Engine(adaptive=args.adaptive)
+    store = None
+    if args.session:
+        with profile.stage("session"):
+            store = SessionStore(args.session)
+            store.resume(engine)
+    recorder = KeyRecorder(args.record, engine) if args.record else None
+    profiler = FrameProfiler() if args.profile_frames else None
+    game = Game(engine, event_driven=args.event_driven and replay is None,
+                store=store, profile=profile, profiler=profiler,
+                recorder=recorder, replay=replay)
+    if args.profile_startup:
+        print(profile.report(), file=sys.stderr)
+    game.run_game()
+    if args.profile_startup:
+        # The images are loaded behind the game, so how long they took
+        # is only all known once it is over
+        print("\nImages loaded\n" + game.assets.report(), file=sys.stderr)
+    if args.profile_frames:
+        game.profiler.dump(args.profile_frames)
+
+if __name__ == '__main__':
+    main()
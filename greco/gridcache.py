@@ -0,0 +1,55 @@
+"""Cache of parsed Green Code grids.
+
+The game only ever shows a small vocabulary of words, so each word is
+parsed into its grid of colours once and the grid is then shared.
+With a grid pack, the grids of the level words are read from it
+rather than parsed.
+
+"""
+
+from greencode import GreenCode
+
+
+class GridCache(object):
+    """Memoised GreenCode.parse_message and parse_character.
+
+    Grids are returned as tuples, as they are shared between all the
+    users of the cache. Messages that pack, a GridPack, has are not
+    parsed.
+    """
+    def __init__(self, gcode=None, pack=None):
+        self.gcode = gcode or GreenCode()
+        self.pack = pack
+        self._messages = {}
+        self._characters = {}
+
+    def __len__(self):
+        return len(self._messages)
+
+    def message(self, message):
+        """Return the first grid of message."""
+        try:
+            return self._messages[message]
+        except KeyError:
+            pass
+        grid = None
+        if self.pack is not None:
+            grid = self.pack.get(message)
+        if grid is None:
+            grid = tuple(self.gcode.parse_message(message)[0])
+        self._messages[message] = grid
+        return grid
+
+    def character(self, character):
+        """Return the four colours of a single character."""
+        try:
+            return self._characters[character]
+        except KeyError:
+            colours = tuple(self.gcode.parse_character(character))
+            self._characters[character] = colours
+            return colours
+
+    def warm(self, messages):
+        """Parse messages ahead of their use."""
+        for message in messages:
+            self.message(message)
@@ -0,0 +1,223 @@
+"""Precompiled Green Code grids for the words of a level pack.
+
+Parsing a word into its grid of colours is the slowest part of showing
+a new target, and a word that does not fit on one grid, or that uses
+characters Green Code has no symbols for, would only be found when it
+came up in play. The grid pack holds the first grid of every word of a
+level pack, parsed ahead of time, and building it checks every word.
+
+Layout (all integers are little endian unsigned 32 bit):
+
+    magic          b'GRGP'
+    version        1
+    checksum       the CRC-32 of the level pack the grids were made from
+    word count     W, the same as the level pack
+    cell count     N, the LEDs in a grid
+    colour count   C, at most 16
+    palette        C colours, each three bytes of red, green and blue
+    grids          W grids of N cells, in the order of the word numbers
+                   of the level pack, two cells to a byte with the
+                   first in the high four bits
+
+The words are parsed across a pool of worker processes:
+
+    python -m greco.gridpack greco/levels.pack -o greco/grids.pack
+
+A grid pack made from another level pack than the one the game loads
+is not used, so the game goes back to parsing words as they come up.
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import multiprocessing
+import os
+import struct
+import sys
+from itertools import chain
+
+from greencode import GreenCode
+
+from .levelpack import LevelPack, map_file
+
+MAGIC = b'GRGP'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIII')
+
+DIRECTORY = os.path.split(__file__)[0]
+
+# Each cell is a four bit index into the palette
+MAX_COLOURS = 16
+
+# The Green Code parser and the palette index of each of its colours,
+# made once in each worker process
+_GCODE = None
+_INDEXES = None
+
+
+class GridPackError(ValueError):
+    """The file is not a grid pack for the level pack given."""
+
+
+def _palette(gcode):
+    """Get the colours of Green Code, in a fixed order."""
+    return sorted(set(gcode.colours.values()))
+
+
+def _start_worker():
+    """Make the Green Code parser for this process."""
+    global _GCODE, _INDEXES  # pylint: disable=global-statement
+    _GCODE = GreenCode()
+    _INDEXES = dict((colour, index)
+                    for index, colour in enumerate(_palette(_GCODE)))
+
+
+def compile_word(word):
+    """Parse word into the palette indexes of its first grid. Return
+    them and what is wrong with the word, or None if nothing is."""
+    if _GCODE is None:
+        _start_worker()
+    gcode = _GCODE
+    problems = []
+    unknown = sorted(set(character for character in word.lower()
+                         if character not in gcode.characters and
+                         not character.isspace()))
+    if unknown:
+        problems.append('has no symbols for %s' % ''.join(unknown))
+    grids = gcode.parse_message(word)
+    if not grids:
+        problems.append('is blank')
+        grid = list(gcode.blankpart) * 2
+    else:
+        grid = grids[0]
+        if len(grids) > 1:
+            problems.append('needs %d grids' % len(grids))
+    return (bytearray(_INDEXES[tuple(colour)] for colour in grid),
+            '; '.join(problems) or None)
+
+
+def compile_words(words, processes=None):
+    """Parse words across a pool of processes. Return the grids, as
+    palette indexes, and a (word, problem) pair for each word that does
+    not fit one grid or has characters that cannot be shown."""
+    pool = multiprocessing.Pool(processes, initializer=_start_worker)
+    try:
+        compiled = pool.map(compile_word, words,
+                            chunksize=max(1, len(words) // 64))
+    finally:
+        pool.close()
+        pool.join()
+    grids = [grid for grid, _ in compiled]
+    problems = [(word, problem)
+                for word, (_, problem) in zip(words, compiled) if problem]
+    return grids, problems
+
+
+def write_pack(levels, grids, pack_buf, gcode=None):
+    """Write grids, one for each word of the level pack levels, to a
+    binary file."""
+    palette = _palette(gcode or GreenCode())
+    if len(palette) > MAX_COLOURS:
+        raise GridPackError('Green Code has %d colours, more than the %d '
+                            'a grid pack can hold'
+                            % (len(palette), MAX_COLOURS))
+    cells = len(grids[0]) if grids else 0
+    pack_buf.write(HEADER.pack(MAGIC, VERSION, levels.checksum, len(grids),
+                               cells, len(palette)))
+    pack_buf.write(bytearray(chain.from_iterable(palette)))
+    for grid in grids:
+        pack_buf.write(bytearray(grid[index] << 4 | grid[index + 1]
+                                 for index in range(0, cells, 2)))
+
+
+class GridPack(object):
+    """The grids of the words of the level pack levels, read from a
+    grid pack file.
+
+    Grids are looked up by word and decoded as they are needed.
+    """
+    def __init__(self, path, levels):
+        self._data = map_file(path)
+        if len(self._data) < HEADER.size:
+            raise GridPackError('%s is too short to be a grid pack' % path)
+        magic, version, checksum, word_count, cells, colour_count = \
+            HEADER.unpack_from(self._data)
+        if magic != MAGIC or version != VERSION:
+            raise GridPackError('%s is not a version %d grid pack'
+                                % (path, VERSION))
+        if checksum != levels.checksum or word_count != levels.word_count:
+            raise GridPackError('%s was made from other levels' % path)
+        palette = bytearray(
+            self._data[HEADER.size:HEADER.size + colour_count * 3])
+        palette = [tuple(palette[index:index + 3])
+                   for index in range(0, len(palette), 3)]
+        # Indexes past the end of the palette are only in damaged packs
+        palette += palette[:1] * (MAX_COLOURS - len(palette))
+        # The two colours of each byte
+        self._pairs = [(palette[byte >> 4], palette[byte & 15])
+                       for byte in range(256)]
+        self._levels = levels
+        self._size = cells // 2
+        self._grids_start = HEADER.size + colour_count * 3
+
+    def __len__(self):
+        return self._levels.word_count
+
+    def grid(self, number):
+        """Return the grid of the word numbered number."""
+        start = self._grids_start + number * self._size
+        data = bytearray(self._data[start:start + self._size])
+        return tuple(chain.from_iterable(map(self._pairs.__getitem__, data)))
+
+    def get(self, word):
+        """Return the grid of word, or None if it is not in a level of
+        the level pack that has been read."""
+        number = self._levels.number(word)
+        if number is None:
+            return None
+        return self.grid(number)
+
+
+def load_grid_pack(levels, directory=DIRECTORY):
+    """Open the grid pack for levels, or return None if levels is not a
+    level pack, or there is no grid pack made from it."""
+    if not isinstance(levels, LevelPack):
+        return None
+    try:
+        return GridPack(os.path.join(directory, 'grids.pack'), levels)
+    except (IOError, OSError, GridPackError):
+        return None
+
+
+def main(argv=None):
+    """Parse every word of a level pack into its Green Code grid, check
+    that each fits one grid, and write them to a grid pack."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('level_pack', help='the level pack to read the '
+                        'words from')
+    parser.add_argument('-o', '--output', help='where to write the grid '
+                        'pack (default: only check the words)')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes (default: one per core)')
+    parser.add_argument('--force', action='store_true',
+                        help='write the grid pack even if some words do '
+                        'not fit, using their first grid')
+    args = parser.parse_args(argv)
+
+    levels = LevelPack(args.level_pack)
+    words = [levels.word(number) for number in range(levels.word_count)]
+    grids, problems = compile_words(words, args.processes)
+    for word, problem in problems:
+        print('%r %s' % (word, problem), file=sys.stderr)
+    print('Checked %d words, %d do not fit' % (len(words), len(problems)),
+          file=sys.stderr)
+    if args.output and (args.force or not problems):
+        with open(args.output, 'wb') as pack_buf:
+            write_pack(levels, grids, pack_buf)
+        print('Wrote %d grids to %s' % (len(grids), args.output))
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
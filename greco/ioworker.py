@@ -0,0 +1,92 @@
+"""A pool of threads for reading files while the game is running.
+
+The game loop should never wait on the filesystem, which can be slow
+when the home directory is on the network. Loads are handed to an
+IOWorker, which runs them on its threads and queues the results. The
+game loop calls drain once a frame, which runs the callbacks of the
+finished loads on the game's own thread, where it is safe to use
+their results with pygame.
+
+    worker = IOWorker(notify=wake_up_the_game_loop)
+    worker.submit(read_file, (path,), callback=use_the_contents)
+    ...
+    worker.drain()
+
+"""
+
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+THREADS = 2
+
+
+class IOWorker(object):
+    """Runs blocking loads on background threads.
+
+    If notify is given, it is called on the background thread every
+    time a load finishes, for example to wake up a game loop that is
+    waiting for events.
+    """
+    def __init__(self, threads=THREADS, notify=None):
+        self.notify = notify
+        self._requests = queue.Queue()
+        self._completed = queue.Queue()
+        self._threads = []
+        for _ in range(threads):
+            thread = threading.Thread(target=self._work)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        """Run the requested loads until told to stop."""
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            function, args, callback = request
+            try:
+                result = function(*args)
+            except Exception as error:  # pylint: disable=broad-except
+                self._completed.put((callback, None, error))
+            else:
+                self._completed.put((callback, result, None))
+            if self.notify is not None:
+                self.notify()
+
+    def submit(self, function, args=(), callback=None):
+        """Call function with args on a background thread. When it is
+        done, drain calls callback(result, error), where error is the
+        exception it raised, if any."""
+        self._requests.put((function, args, callback))
+
+    def drain(self):
+        """Run the callbacks of the finished loads. Return how many
+        there were."""
+        count = 0
+        while True:
+            try:
+                callback, result, error = self._completed.get_nowait()
+            except queue.Empty:
+                return count
+            count += 1
+            if callback is not None:
+                callback(result, error)
+
+    def close(self):
+        """Stop the threads without waiting for them. The loads not yet
+        started are dropped, and those being run finish on their own,
+        with their results thrown away."""
+        self.notify = None
+        while True:
+            try:
+                self._requests.get_nowait()
+            except queue.Empty:
+                break
+        for _ in self._threads:
+            self._requests.put(None)
+        self._threads = []
@@ -0,0 +1,242 @@
+"""Recording the keystrokes of a game, to play them again later.
+
+A key log holds everything needed to play a game again exactly: the
+seed the engine chose its targets with, the player's progress when
+the recording started, and every keystroke with its game time. At the
+end it holds the progress the game finished with, so a replay can be
+checked against it, for example after changing how guesses are
+scored.
+
+The format, all little-endian:
+
+    magic b'GRKL', version (uint16)
+    header length (uint32), header (UTF-8 JSON)
+    events: game time in seconds (float64), code (uint16)
+    end event: game time, END, state length (uint32), state (JSON)
+
+The code of an event is the character typed, or BACKSPACE or SUBMIT
+from the engine module. A log that was cut off, say by a crash, has
+no end event and so can be replayed but not checked.
+
+    python -m greco.keylog sessions/*.keys
+
+replays logs faster than real time and checks them. To watch one at
+the pace it was played, use ``greco --replay FILE``.
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import random
+import struct
+import sys
+
+from .engine import Engine, BACKSPACE, SUBMIT
+
+MAGIC = b'GRKL'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sH')
+_LENGTH = struct.Struct('<I')
+_EVENT = struct.Struct('<dH')
+
+# The code of the end event
+END = 0xffff
+
+# How many events are read from a log at a time
+_CHUNK = 4096
+
+try:
+    _chr = unichr  # pylint: disable=invalid-name,undefined-variable
+except NameError:
+    _chr = chr  # pylint: disable=invalid-name
+
+
+class KeyLogError(Exception):
+    """The file is not a key log that can be read."""
+
+
+class KeyRecorder(object):
+    """Records the keystrokes of a game played by engine to path.
+
+    The engine is given a new seed, which is recorded, so that the
+    targets of the game can be chosen again in the same order.
+    """
+    def __init__(self, path, engine):
+        seed = random.getrandbits(32)
+        engine.random.seed(seed)
+        header = json.dumps({
+            'seed': seed,
+            'adaptive': engine.scheduler is not None,
+            'state': engine.get_state(),
+            'target': engine.current_target,
+            'started': engine.started,
+        }).encode('utf-8')
+        self.engine = engine
+        self._file = open(path, 'wb')
+        self._file.write(_HEADER.pack(MAGIC, VERSION))
+        self._file.write(_LENGTH.pack(len(header)))
+        self._file.write(header)
+        self._timestamp = 0.0
+
+    def _write(self, timestamp, code):
+        """Write an event."""
+        self._timestamp = timestamp
+        self._file.write(_EVENT.pack(timestamp, code))
+
+    def press(self, timestamp, character):
+        """Record a character typed."""
+        self._write(timestamp, ord(character))
+
+    def backspace(self, timestamp):
+        """Record a character deleted."""
+        self._write(timestamp, ord(BACKSPACE))
+
+    def submit(self, timestamp):
+        """Record a guess submitted."""
+        self._write(timestamp, ord(SUBMIT))
+
+    def close(self):
+        """Record the engine's progress, and finish the log."""
+        if self._file is None:
+            return
+        state = json.dumps(self.engine.get_state()).encode('utf-8')
+        self._write(self._timestamp, END)
+        self._file.write(_LENGTH.pack(len(state)))
+        self._file.write(state)
+        self._file.close()
+        self._file = None
+
+
+class KeyLogReader(object):
+    """Reads a key log as it is played back.
+
+    Iterating over the reader gives (game time, keystroke) pairs, in
+    the form Engine.run takes. Once they have all been read,
+    final_state is the progress the game finished with, or None if the
+    log was cut off.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.final_state = None
+        with open(path, 'rb') as log:
+            magic, version = _HEADER.unpack(_read(log, _HEADER.size))
+            if magic != MAGIC:
+                raise KeyLogError('%s is not a key log' % path)
+            if version != VERSION:
+                raise KeyLogError('%s has unknown version %d' % (
+                    path, version))
+            self.header = _read_json(log)
+            self._start = log.tell()
+
+    def make_engine(self, levels=None):
+        """Make an engine in the state the game was recorded from."""
+        engine = Engine(levels, seed=self.header['seed'],
+                        adaptive=self.header['adaptive'])
+        engine.set_state(self.header['state'])
+        engine.current_target = self.header['target']
+        engine.started = self.header['started']
+        return engine
+
+    def __iter__(self):
+        with open(self.path, 'rb') as log:
+            position = self._start
+            log.seek(position)
+            while True:
+                chunk = log.read(_EVENT.size * _CHUNK)
+                # An event cut off at the end is dropped
+                whole = len(chunk) - len(chunk) % _EVENT.size
+                for timestamp, code in _iter_events(chunk[:whole]):
+                    position += _EVENT.size
+                    if code == END:
+                        log.seek(position)
+                        try:
+                            self.final_state = _read_json(log)
+                        except KeyLogError:
+                            pass
+                        return
+                    yield timestamp, _chr(code)
+                if len(chunk) < _EVENT.size * _CHUNK:
+                    return
+
+
+def _iter_events(data):
+    """Unpack the events in data."""
+    if hasattr(_EVENT, 'iter_unpack'):
+        return _EVENT.iter_unpack(data)
+    # Python 2
+    return (_EVENT.unpack_from(data, offset)
+            for offset in range(0, len(data), _EVENT.size))
+
+
+def _read(log, size):
+    """Read size bytes from log."""
+    data = log.read(size)
+    if len(data) < size:
+        raise KeyLogError('%s is cut off' % log.name)
+    return data
+
+
+def _read_json(log):
+    """Read a length and that much JSON from log."""
+    length, = _LENGTH.unpack(_read(log, _LENGTH.size))
+    return json.loads(_read(log, length).decode('utf-8'))
+
+
+def replay(path, levels=None):
+    """Play a key log again, as fast as possible. Return the engine as
+    it finished, the results of the guesses and the reader."""
+    reader = KeyLogReader(path)
+    engine = reader.make_engine(levels)
+    results = engine.run(reader)
+    return engine, results, reader
+
+
+def check(path, levels=None):
+    """Replay a key log and compare the progress it finishes with to
+    what was recorded. Return the names of the parts of the progress
+    that differ, or None if the log was cut off, and the results of
+    the guesses."""
+    engine, results, reader = replay(path, levels)
+    if reader.final_state is None:
+        return None, results
+    # Compare like with like, as the recorded state went through JSON
+    state = json.loads(json.dumps(engine.get_state()))
+    return sorted(name for name in state
+                  if state[name] != reader.final_state.get(name)), results
+
+
+def main(argv=None):
+    """Replay key logs and check that they finish with the progress
+    that was recorded."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('logs', nargs='+', metavar='LOG')
+    parser.add_argument('--quiet', action='store_true',
+                        help='only report the logs that do not match')
+    args = parser.parse_args(argv)
+
+    levels = Engine().levels
+    problems = 0
+    for path in args.logs:
+        try:
+            differences, results = check(path, levels)
+        except (IOError, OSError, KeyLogError) as error:
+            print('%s: %s' % (path, error))
+            problems += 1
+            continue
+        if differences:
+            print('%s: %s differ' % (path, ', '.join(differences)))
+            problems += 1
+        elif not args.quiet:
+            print('%s: %s after %d guesses' % (
+                path, 'cut off' if differences is None else 'ok',
+                len(results)))
+    if not args.quiet or problems:
+        print('%d of %d logs did not match' % (problems, len(args.logs)))
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
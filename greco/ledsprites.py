@@ -0,0 +1,57 @@
+"""Pre-drawn LEDs.
+
+Drawing an LED takes a circle and a square. There are only a few
+colours in Green Code and a couple of sizes of LED, so each colour and
+size is drawn once, by ledgrid's own LED.draw, onto a sprite. Drawing
+a panel of LEDs is then one batch of blits.
+
+"""
+
+import pygame
+
+from ledgrid import LED
+
+# Space around the LED on its sprite, in case the circle spills over
+PAD = 1
+
+
+class LEDSprites(object):
+    """Sprites of LEDs, made as they are first needed."""
+    def __init__(self):
+        self._sprites = {}
+
+    def sprite(self, radius, colour=None):
+        """Get the sprite of an LED of radius lit in colour, or unlit if
+        colour is None."""
+        if colour is not None:
+            colour = tuple(colour)
+        key = (radius, colour)
+        try:
+            return self._sprites[key]
+        except KeyError:
+            pass
+        size = 2 * (radius + PAD) + 1
+        surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 0))
+        led = LED(radius=radius, margins=(PAD, PAD), screen=surface)
+        if colour is not None:
+            led.colour = colour
+        led.lit = colour is not None
+        led.draw()
+        sprite = surface.convert_alpha()
+        self._sprites[key] = sprite
+        return sprite
+
+    def draw(self, screen, leds):
+        """Draw leds onto screen."""
+        batch = []
+        for led in leds:
+            sprite = self.sprite(led.radius, led.colour if led.lit else None)
+            batch.append((sprite, (led.pos_x - led.radius - PAD,
+                                   led.pos_y - led.radius - PAD)))
+        if hasattr(screen, 'blits'):
+            screen.blits(batch, doreturn=False)
+        else:
+            # Older pygame
+            for sprite, position in batch:
+                screen.blit(sprite, position)
@@ -0,0 +1,201 @@
+"""Compact level pack format.
+
+A level pack holds the same data as the levels JSON files, but each
+distinct word is stored only once and the levels are lists of word
+numbers, so a level can be read straight out of a memory mapped file
+without parsing the whole corpus.
+
+Layout (all integers are little endian unsigned 32 bit):
+
+    magic          b'GRLP'
+    version        1
+    level count    L
+    word count     W
+    word offsets   W + 1 byte offsets into the strings
+    level offsets  L + 1 offsets into the level entries
+    level entries  word numbers, level after level
+    strings        the UTF-8 encoded words, one after another
+
+To convert the JSON levels into a pack:
+
+    python -m greco.levelpack greco/levels1.json -o greco/levels.pack
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+
+MAGIC = b'GRLP'
+VERSION = 1
+HEADER = struct.Struct('<4sIII')
+
+
+class LevelPackError(ValueError):
+    """The file is not a level pack this module can read."""
+
+
+def _to_array(data):
+    """Read little endian unsigned 32 bit integers from data."""
+    numbers = array('I')
+    if numbers.itemsize != 4:
+        numbers = array('L')
+    if hasattr(numbers, 'frombytes'):
+        numbers.frombytes(data)
+    else:
+        # Python 2
+        numbers.fromstring(data)
+    if sys.byteorder == 'big':
+        numbers.byteswap()
+    return numbers
+
+
+def _to_bytes(numbers):
+    """Write numbers as little endian unsigned 32 bit integers."""
+    numbers = array('I' if array('I').itemsize == 4 else 'L', numbers)
+    if sys.byteorder == 'big':
+        numbers.byteswap()
+    if hasattr(numbers, 'tobytes'):
+        return numbers.tobytes()
+    # Python 2
+    return numbers.tostring()
+
+
+def map_file(path):
+    """Map the file at path into memory, read only, or read it if it
+    cannot be mapped."""
+    with open(path, 'rb') as pack_buf:
+        try:
+            return mmap.mmap(pack_buf.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, mmap.error):
+            # Empty files and some file systems cannot be mapped
+            return pack_buf.read()
+
+
+def write_pack(levels, pack_buf):
+    """Write the levels, a list of word lists, to a binary file."""
+    numbers = {}
+    words = []
+    entries = []
+    level_offsets = [0]
+    for level in levels:
+        for word in level:
+            if word not in numbers:
+                numbers[word] = len(words)
+                words.append(word)
+            entries.append(numbers[word])
+        level_offsets.append(len(entries))
+
+    encoded = [word.encode('utf-8') for word in words]
+    word_offsets = [0]
+    for word in encoded:
+        word_offsets.append(word_offsets[-1] + len(word))
+
+    pack_buf.write(HEADER.pack(MAGIC, VERSION, len(levels), len(words)))
+    pack_buf.write(_to_bytes(word_offsets))
+    pack_buf.write(_to_bytes(level_offsets))
+    pack_buf.write(_to_bytes(entries))
+    pack_buf.write(b''.join(encoded))
+
+
+class LevelPack(object):
+    """A read only sequence of levels backed by a level pack file.
+
+    Only the tables are read when the pack is opened; the words of a
+    level are decoded the first time the level is used.
+    """
+    def __init__(self, path):
+        self._data = map_file(path)
+        if len(self._data) < HEADER.size:
+            raise LevelPackError('%s is too short to be a level pack' % path)
+        magic, version, level_count, word_count = HEADER.unpack_from(
+            self._data)
+        if magic != MAGIC or version != VERSION:
+            raise LevelPackError('%s is not a version %d level pack'
+                                 % (path, VERSION))
+        position = HEADER.size
+        end = position + (word_count + 1) * 4
+        self._word_offsets = _to_array(self._data[position:end])
+        position, end = end, end + (level_count + 1) * 4
+        self._level_offsets = _to_array(self._data[position:end])
+        self._entries_start = end
+        self._strings_start = end + self._level_offsets[-1] * 4
+        self._words = {}
+        self._numbers = {}
+        self._levels = {}
+        self._checksum = None
+
+    def __len__(self):
+        return len(self._level_offsets) - 1
+
+    def __getitem__(self, level):
+        try:
+            return self._levels[level]
+        except KeyError:
+            pass
+        if not 0 <= level < len(self):
+            raise IndexError('level out of range')
+        start = self._entries_start + self._level_offsets[level] * 4
+        end = self._entries_start + self._level_offsets[level + 1] * 4
+        words = tuple(self.word(number)
+                      for number in _to_array(self._data[start:end]))
+        self._levels[level] = words
+        return words
+
+    @property
+    def word_count(self):
+        """How many distinct words there are."""
+        return len(self._word_offsets) - 1
+
+    @property
+    def checksum(self):
+        """The CRC-32 of the whole pack, to tell packs apart."""
+        if self._checksum is None:
+            self._checksum = zlib.crc32(self._data) & 0xffffffff
+        return self._checksum
+
+    def word(self, number):
+        """Decode a word, sharing one string between all its uses."""
+        try:
+            return self._words[number]
+        except KeyError:
+            pass
+        start = self._strings_start + self._word_offsets[number]
+        end = self._strings_start + self._word_offsets[number + 1]
+        word = self._data[start:end].decode('utf-8')
+        self._words[number] = word
+        self._numbers[word] = number
+        return word
+
+    def number(self, word):
+        """Return the number of word, or None if it is not a word of a
+        level that has been read."""
+        return self._numbers.get(word)
+
+
+def main(argv=None):
+    """Convert JSON level files into a level pack."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('json_files', nargs='+',
+                        help='JSON level files, joined in the order given')
+    parser.add_argument('-o', '--output', required=True,
+                        help='where to write the level pack')
+    args = parser.parse_args(argv)
+
+    levels = []
+    for path in args.json_files:
+        with open(path) as level_buf:
+            levels.extend(json.load(level_buf))
+    with open(args.output, 'wb') as pack_buf:
+        write_pack(levels, pack_buf)
+    print('Wrote %d levels to %s' % (len(levels), args.output))
+
+
+if __name__ == '__main__':
+    main()
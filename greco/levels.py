@@ -0,0 +1,141 @@
+"""Index of the words available at each level.
+
+The words of a level are bucketed by their length and by how much of
+the alphabet is needed to write them, so that a word meeting both
+limits can be picked in constant time without rerolling. The words
+meeting the limits can also be indexed by the characters they
+contain, for the adaptive scheduler.
+
+"""
+
+import json
+import os
+import random
+
+from .levelpack import LevelPack
+
+DIRECTORY = os.path.split(__file__)[0]
+
+
+def load_levels(directory=DIRECTORY):
+    """Open the level pack, or read the JSON levels if there is none."""
+    pack = os.path.join(directory, 'levels.pack')
+    if os.path.exists(pack):
+        return LevelPack(pack)
+    with open(os.path.join(directory, 'levels1.json')) as level_buf:
+        levels = json.load(level_buf)
+    levels2 = os.path.join(directory, 'levels2.json')
+    if os.path.exists(levels2):
+        with open(levels2) as level_buf:
+            levels.extend(json.load(level_buf))
+    return levels
+
+
+class CharacterIndex(object):
+    """The words of a pool by the characters they contain.
+
+    characters is the sorted characters used in words, and postings
+    holds the words containing each of them, in the same order.
+    """
+    def __init__(self, words):
+        postings = {}
+        for word in words:
+            for character in set(word):
+                postings.setdefault(character, []).append(word)
+        self.words = words
+        self.characters = tuple(sorted(postings))
+        self.postings = tuple(tuple(postings[character])
+                              for character in self.characters)
+
+
+class LevelIndex(object):
+    """The words of each level, indexed for sampling.
+
+    levels is a sequence of word lists, one per level. alphabet is
+    the order in which characters are introduced; the rank of a word
+    is the position in the alphabet of its latest introduced
+    character, so a word can be written with the first n characters
+    of the alphabet when its rank is less than n.
+    """
+    def __init__(self, levels, alphabet=''):
+        self._levels = levels
+        self._ranks = {}
+        for index, character in enumerate(alphabet):
+            self._ranks.setdefault(character, index)
+        self._unranked = len(alphabet)
+        self._buckets = {}
+        self._pools = {}
+        self._character_indexes = {}
+
+    def __len__(self):
+        return len(self._levels)
+
+    def __getitem__(self, level):
+        return self._levels[self._wrap(level)]
+
+    @property
+    def corpus(self):
+        """The levels the index was made from."""
+        return self._levels
+
+    def _wrap(self, level):
+        """Levels past the end of the corpus start again at the
+        beginning."""
+        return level % len(self._levels)
+
+    def rank(self, word):
+        """Return the alphabet rank of word."""
+        ranks = self._ranks
+        unranked = self._unranked
+        return max(ranks.get(character, unranked) for character in word)
+
+    def _get_buckets(self, level):
+        """Return the words of level bucketed by (length, rank)."""
+        try:
+            return self._buckets[level]
+        except KeyError:
+            pass
+        buckets = {}
+        for word in self._levels[level]:
+            buckets.setdefault((len(word), self.rank(word)), []).append(word)
+        self._buckets[level] = buckets
+        return buckets
+
+    def pool(self, level, max_length=None, alphabet=None):
+        """Return the words of level that are at most max_length long
+        and only use the first alphabet characters of the alphabet.
+        If no word qualifies, all the words of the level are returned.
+        """
+        level = self._wrap(level)
+        key = (level, max_length, alphabet)
+        try:
+            return self._pools[key]
+        except KeyError:
+            pass
+        pool = tuple(
+            word
+            for (length, rank), words in sorted(
+                self._get_buckets(level).items())
+            if (max_length is None or length <= max_length) and
+            (alphabet is None or rank < alphabet)
+            for word in words)
+        if not pool:
+            pool = tuple(self._levels[level])
+        self._pools[key] = pool
+        return pool
+
+    def character_index(self, level, max_length=None, alphabet=None):
+        """Return the words that pool gives for the same arguments,
+        indexed by character. The index is built once and shared."""
+        key = (self._wrap(level), max_length, alphabet)
+        try:
+            return self._character_indexes[key]
+        except KeyError:
+            pass
+        index = CharacterIndex(self.pool(level, max_length, alphabet))
+        self._character_indexes[key] = index
+        return index
+
+    def sample(self, level, max_length=None, alphabet=None, rng=random):
+        """Pick a random word from level within the given limits."""
+        return rng.choice(self.pool(level, max_length, alphabet))
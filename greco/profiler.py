@@ -0,0 +1,162 @@
+"""Timing how long the game takes to start and to draw its frames.
+
+The stages of starting up are timed with StartupProfile, which tells
+how long the player waited for the first frame, and what the rest of
+the start up did behind it.
+
+    profile = StartupProfile()
+    with profile.stage('display'):
+        set_up_the_display()
+    profile.mark_first_frame()
+    print(profile.report())
+
+The sections of each frame are timed with FrameProfiler, which keeps
+the timings of the last few hundred frames and summarises them.
+
+    profiler.start_frame()
+    draw_the_leds()
+    profiler.lap('leds')
+    ...
+    profiler.end_frame()
+
+The game only calls the profiler if there is one, so it costs nothing
+until it is turned on.
+
+"""
+
+from __future__ import division
+
+import csv
+import json
+from collections import OrderedDict
+from contextlib import contextmanager
+from timeit import default_timer as timer
+
+from .stats import Analytics, RollingStat
+
+# How many frames the timings of each section are kept for
+FRAMES = 600
+
+
+class StartupProfile(object):
+    """Times the stages of starting the game."""
+    def __init__(self):
+        self.started = timer()
+        self.stages = []
+        self.first_frame = None
+
+    @contextmanager
+    def stage(self, name):
+        """Time the stage called name, the body of the with block."""
+        start = timer()
+        try:
+            yield
+        finally:
+            self.stages.append((name, timer() - start))
+
+    def mark_first_frame(self):
+        """Note that the first frame has been shown."""
+        self.first_frame = timer() - self.started
+
+    def report(self):
+        """Describe how long each stage took."""
+        lines = ["%-30s %8.2f ms" % (name, seconds * 1000)
+                 for name, seconds in self.stages]
+        if self.first_frame is not None:
+            lines.append("%-30s %8.2f ms" % ("First frame",
+                                             self.first_frame * 1000))
+        lines.append("%-30s %8.2f ms" % ("Total",
+                                         (timer() - self.started) * 1000))
+        return "\n".join(lines)
+
+
+class FrameProfiler(object):
+    """Times the sections of the frames being drawn.
+
+    The timings of each section, in milliseconds, are kept in a window
+    of the last size frames it was timed in. The whole of each frame
+    is timed as the section called "frame".
+    """
+    def __init__(self, size=FRAMES):
+        self.size = size
+        self.sections = OrderedDict()
+        self._analytics = Analytics()
+        self._frame_start = None
+        self._last = None
+
+    def add(self, name, seconds):
+        """Add a timing of the section called name."""
+        try:
+            stat = self.sections[name]
+        except KeyError:
+            stat = self.sections[name] = RollingStat(self.size)
+        stat.append(seconds * 1000)
+
+    def start_frame(self):
+        """Start timing a frame."""
+        self._frame_start = self._last = timer()
+
+    def lap(self, name):
+        """Time the section called name as what was done since the frame
+        started or the last lap. Does nothing outside of a frame."""
+        if self._last is None:
+            return
+        now = timer()
+        self.add(name, now - self._last)
+        self._last = now
+
+    def end_frame(self):
+        """Finish timing a frame."""
+        if self._frame_start is None:
+            return
+        self.add("frame", timer() - self._frame_start)
+        self._frame_start = self._last = None
+
+    def summarise(self):
+        """Get how many timings there are of each section, and their
+        mean, median and 99th percentile."""
+        summary = OrderedDict()
+        for name, stat in self.sections.items():
+            percentiles = self._analytics.summarise(name, stat)
+            summary[name] = {
+                'count': len(stat),
+                'mean_ms': round(stat.mean, 3),
+                'p50_ms': round(percentiles['p50'], 3),
+                'p99_ms': round(percentiles['p99'], 3),
+            }
+        return summary
+
+    def report_lines(self, sections=3):
+        """Describe the frame times and the slowest sections, in a few
+        short lines."""
+        summary = self.summarise()
+        lines = []
+        frame = summary.pop("frame", None)
+        if frame is not None:
+            lines.append("frame p50 %.2f p99 %.2f ms" % (
+                frame['p50_ms'], frame['p99_ms']))
+        slowest = sorted(summary.items(),
+                         key=lambda item: item[1]['p99_ms'], reverse=True)
+        for name, section in slowest[:sections]:
+            lines.append("%s p99 %.2f ms" % (name, section['p99_ms']))
+        return lines
+
+    def dump(self, path):
+        """Write the summary to path, as CSV if it ends with .csv and
+        as JSON, with the timings themselves, otherwise."""
+        summary = self.summarise()
+        with open(path, 'w') as output:
+            if path.endswith('.csv'):
+                writer = csv.writer(output)
+                writer.writerow(
+                    ['section', 'count', 'mean_ms', 'p50_ms', 'p99_ms'])
+                for name, section in summary.items():
+                    writer.writerow(
+                        [name, section['count'], section['mean_ms'],
+                         section['p50_ms'], section['p99_ms']])
+            else:
+                for name, section in summary.items():
+                    section['timings_ms'] = [
+                        round(value, 3) for value in self.sections[name]]
+                json.dump(summary, output, indent=1)
+                output.write('\n')
@@ -0,0 +1,104 @@
+"""Scoring of guesses against their targets.
+
+A guess is aligned with its target by edit distance (Levenshtein),
+and the alignment says which characters of the target were mistaken
+for which, i.e. which Green Code glyphs the player confused.
+
+Guesses are short (at most MAX_GUESS_LENGTH characters), so the whole
+table fits in a few hundred cells. Only the cells within a band around
+the diagonal are filled in: if the guess is so far off that the best
+alignment leaves the band, the distance found is an upper bound, which
+still gives the guess a low accuracy.
+
+"""
+
+from __future__ import division
+
+from collections import namedtuple
+
+# How far off the diagonal, beyond the difference in length, the
+# alignment may wander
+BAND = 4
+
+# The result of scoring a guess. accuracy is a percentage, distance is
+# the number of edits between guess and target, and confusions are the
+# (target character, typed character) pairs that did not match, with ''
+# for a character that was left out or typed in extra.
+Score = namedtuple('Score', ('accuracy', 'distance', 'confusions'))
+
+_PERFECT = Score(100, 0, ())
+
+
+def score_guess(target, guess, band=BAND):
+    """Score guess against target."""
+    if target == guess:
+        return _PERFECT
+    rows = len(target) + 1
+    columns = len(guess) + 1
+    width = abs(len(target) - len(guess)) + band
+    infinity = rows + columns
+    table = [[infinity] * columns for _ in range(rows)]
+    for column in range(min(columns, width + 1)):
+        table[0][column] = column
+    for row in range(1, rows):
+        if row <= width:
+            table[row][0] = row
+        target_char = target[row - 1]
+        above = table[row - 1]
+        current = table[row]
+        for column in range(max(1, row - width),
+                            min(columns, row + width + 1)):
+            cost = above[column - 1]
+            if guess[column - 1] != target_char:
+                cost += 1
+            if above[column] + 1 < cost:
+                cost = above[column] + 1
+            if current[column - 1] + 1 < cost:
+                cost = current[column - 1] + 1
+            current[column] = cost
+
+    distance = table[-1][-1]
+    longest = max(len(target), len(guess))
+    accuracy = round(100 * max(longest - distance, 0) / longest)
+    return Score(accuracy, distance, _trace(table, target, guess))
+
+
+def _trace(table, target, guess):
+    """Follow the table back from the end to find the mismatches."""
+    confusions = []
+    row = len(target)
+    column = len(guess)
+    while row or column:
+        cost = table[row][column]
+        if row and column:
+            matched = target[row - 1] == guess[column - 1]
+            if table[row - 1][column - 1] + (not matched) == cost:
+                if not matched:
+                    confusions.append((target[row - 1], guess[column - 1]))
+                row -= 1
+                column -= 1
+                continue
+        if row and table[row - 1][column] + 1 == cost:
+            confusions.append((target[row - 1], ''))
+            row -= 1
+        else:
+            confusions.append(('', guess[column - 1]))
+            column -= 1
+    confusions.reverse()
+    return tuple(confusions)
+
+
+def score_batch(pairs, band=BAND):
+    """Score an iterable of (target, guess) pairs, such as the guesses
+    of recorded sessions."""
+    return [score_guess(target, guess, band) for target, guess in pairs]
+
+
+def count_confusions(scores):
+    """Count how often each (target character, typed character)
+    confusion happens in scores."""
+    counts = {}
+    for score in scores:
+        for confusion in score.confusions:
+            counts[confusion] = counts.get(confusion, 0) + 1
+    return counts
@@ -0,0 +1,418 @@
+"""Play many sessions of the game from one process, in web browsers.
+
+One server holds the sessions of a whole classroom. The level corpus,
+the Green Code grids and their colours as sent to the browsers are
+loaded once and shared by all the sessions; each session is just its
+Engine. pygame is not needed, the LEDs are drawn by the browser.
+
+    python -m greco.server --port 8000
+
+and then open http://localhost:8000/ in a browser. The page talks to
+a small JSON API:
+
+    POST   /api/sessions              start a session
+    GET    /api/sessions/ID           the state of a session
+    POST   /api/sessions/ID/guess     submit {"guess": "..."}
+    DELETE /api/sessions/ID           finish a session
+
+Sessions that have not been used for SESSION_TIMEOUT seconds are
+dropped.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+
+import argparse
+import json
+import re
+import threading
+import uuid
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from time import monotonic
+except ImportError:
+    # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from time import time as monotonic
+
+try:
+    _TEXT = basestring  # pylint: disable=invalid-name,undefined-variable
+except NameError:
+    _TEXT = str  # pylint: disable=invalid-name
+
+from greencode import OFF
+
+from .engine import Engine, LETTERS, MAX_GUESS_LENGTH
+from .gridcache import GridCache
+from .gridpack import load_grid_pack
+from .levels import LevelIndex, load_levels
+
+# How long a session is kept without being used, in seconds
+SESSION_TIMEOUT = 60 * 60
+
+# The most sessions kept at once
+MAX_SESSIONS = 1000
+
+# The largest request body read, in bytes
+MAX_BODY = 1024
+
+_SESSION_PATH = re.compile(r'^/api/sessions/([0-9a-f]{32})(/guess)?$')
+
+
+class SessionError(Exception):
+    """A request about a session can not be carried out."""
+    def __init__(self, message, status=404):
+        super(SessionError, self).__init__(message)
+        self.status = status
+
+
+class _Session(object):
+    """The state of one learner's session."""
+    __slots__ = ('engine', 'lock', 'last_used')
+
+    def __init__(self, engine, now):
+        self.engine = engine
+        self.lock = threading.Lock()
+        self.last_used = now
+
+
+class SessionServer(object):
+    """Holds the sessions of many learners.
+
+    levels and grids are shared by all the sessions. They are the
+    corpus that comes with the game and a new GridCache, with its grid
+    pack, if not given. With adaptive, each session chooses its targets
+    to practise the learner's weak characters.
+    """
+    def __init__(self, levels=None, grids=None, adaptive=False):
+        self.levels = levels or LevelIndex(load_levels(), LETTERS)
+        self.grids = grids or GridCache(
+            pack=load_grid_pack(self.levels.corpus))
+        self.adaptive = adaptive
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._colours = {}
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _get_colours(self, message):
+        """Get the colours of the LEDs showing message, as CSS colours
+        in rows from the top left."""
+        try:
+            return self._colours[message]
+        except KeyError:
+            colours = [_css(colour) for colour in self.grids.message(message)]
+            self._colours[message] = colours
+            return colours
+
+    def _get_session(self, session_id):
+        """Get a session and note that it has been used."""
+        with self._lock:
+            try:
+                session = self._sessions[session_id]
+            except KeyError:
+                raise SessionError('no session %s' % session_id)
+            session.last_used = monotonic()
+            return session
+
+    def _expire(self, now):
+        """Drop the sessions that have not been used for a while."""
+        for session_id, session in list(self._sessions.items()):
+            if now - session.last_used > SESSION_TIMEOUT:
+                del self._sessions[session_id]
+
+    def create(self):
+        """Start a session and return its state."""
+        now = monotonic()
+        engine = Engine(self.levels, adaptive=self.adaptive)
+        engine.new_target(now)
+        with self._lock:
+            self._expire(now)
+            if len(self._sessions) >= MAX_SESSIONS:
+                raise SessionError('too many sessions', status=503)
+            session_id = uuid.uuid4().hex
+            self._sessions[session_id] = _Session(engine, now)
+        return self._get_state(session_id, engine, now)
+
+    def get_state(self, session_id):
+        """Get the state of a session."""
+        session = self._get_session(session_id)
+        with session.lock:
+            return self._get_state(session_id, session.engine, monotonic())
+
+    def _get_state(self, session_id, engine, now):
+        """Describe what the learner's screen shows."""
+        info = engine.info
+        return {
+            'id': session_id,
+            'level': info['level'],
+            'key_char': info['key_char'],
+            'leds': self._get_colours(engine.current_target),
+            'key': [None if colour == OFF else _css(colour)
+                    for colour in self.grids.character(info['key_char'])],
+            # Whole numbers, as round gives floats in Python 2
+            'wpm': int(info['wpm'][-1]),
+            'average_wpm': int(round(info['wpm'].total_mean)),
+            'accuracy': int(engine.get_average_accuracy()),
+            'elapsed': round(engine.get_elapsed(now), 3),
+        }
+
+    def guess(self, session_id, guess):
+        """Submit a guess, and return how it went and the new state."""
+        session = self._get_session(session_id)
+        with session.lock:
+            now = monotonic()
+            result = session.engine.submit(now, guess[:MAX_GUESS_LENGTH])
+            return {
+                'target': result.target,
+                'guess': result.guess,
+                'accuracy': int(result.accuracy),
+                'level_up': result.level_up,
+                'state': self._get_state(session_id, session.engine, now),
+            }
+
+    def close(self, session_id):
+        """Finish a session."""
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None:
+                raise SessionError('no session %s' % session_id)
+
+
+def _css(colour):
+    """Format an RGB colour for CSS."""
+    return '#%02x%02x%02x' % tuple(colour)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Answers the requests of the browsers."""
+    server_version = 'Greco'
+
+    # pylint: disable=redefined-builtin
+    def log_message(self, format, *args):
+        """Keep quiet unless asked to log requests."""
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def _send(self, status, body, content_type='application/json'):
+        """Send a response."""
+        if content_type == 'application/json':
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        """Read the JSON body of the request."""
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            raise SessionError('bad Content-Length', status=400)
+        if length < 0:
+            raise SessionError('bad Content-Length', status=400)
+        if length > MAX_BODY:
+            raise SessionError('request too large', status=413)
+        try:
+            body = json.loads(self.rfile.read(length).decode('utf-8'))
+        except ValueError:
+            raise SessionError('request is not JSON', status=400)
+        if not isinstance(body, dict):
+            raise SessionError('request is not a JSON object', status=400)
+        return body
+
+    def _answer(self, method):
+        """Route the request to the sessions."""
+        sessions = self.server.sessions
+        if self.path == '/' and method == 'GET':
+            self._send(200, PAGE, 'text/html; charset=utf-8')
+            return
+        if self.path == '/api/sessions' and method == 'POST':
+            self._send(201, sessions.create())
+            return
+        match = _SESSION_PATH.match(self.path)
+        if match is None:
+            raise SessionError('not found')
+        session_id, guess = match.groups()
+        if guess and method == 'POST':
+            text = self._read_json().get('guess', '')
+            if not isinstance(text, _TEXT):
+                raise SessionError('guess is not a string', status=400)
+            self._send(200, sessions.guess(session_id, text))
+        elif not guess and method == 'GET':
+            self._send(200, sessions.get_state(session_id))
+        elif not guess and method == 'DELETE':
+            sessions.close(session_id)
+            self._send(200, {})
+        else:
+            raise SessionError('method not allowed', status=405)
+
+    def _handle(self, method):
+        """Answer a request, turning errors into JSON."""
+        try:
+            self._answer(method)
+        except SessionError as error:
+            self._send(error.status, {'error': str(error)})
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answer a GET request."""
+        self._handle('GET')
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Answer a POST request."""
+        self._handle('POST')
+
+    def do_DELETE(self):  # pylint: disable=invalid-name
+        """Answer a DELETE request."""
+        self._handle('DELETE')
+
+
+class GrecoHTTPServer(ThreadingMixIn, HTTPServer):
+    """Serves the sessions, answering each request in its own thread."""
+    daemon_threads = True
+
+    def __init__(self, address, sessions, verbose=False):
+        HTTPServer.__init__(self, address, _Handler)
+        self.sessions = sessions
+        self.verbose = verbose
+
+
+PAGE = b"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Greco - Green Code Learning Game</title>
+<style>
+body { background: #003319; color: white; font-family: sans-serif; }
+#game { display: flex; gap: 24px; }
+.leds { display: grid; gap: 6px; }
+#leds { grid-template-columns: repeat(8, 40px); }
+#key { grid-template-columns: 40px; align-content: start; }
+.led { width: 38px; height: 38px; border: 1px solid white;
+       border-radius: 50%; }
+.big { font-size: 48px; font-weight: bold; }
+#guess { font-size: 24px; width: 12em; }
+#wrong { color: #ff8080; min-height: 1.5em; }
+</style>
+</head>
+<body>
+<p>Level <span id="level">0</span> &mdash; Greco - Green Code Learning
+Game</p>
+<div id="game">
+<div id="leds" class="leds"></div>
+<div>
+<p>Last WPM: <span id="wpm" class="big"></span>
+Average WPM: <span id="average" class="big"></span></p>
+<p>Accuracy: <span id="accuracy" class="big"></span>%
+Last char added: <span id="char" class="big"></span></p>
+<p>Time: <span id="clock" class="big">00:00</span></p>
+<p>Your input:<br><input id="guess" maxlength="16" autofocus></p>
+<p id="wrong"></p>
+</div>
+<div id="key" class="leds"></div>
+</div>
+<script>
+"use strict";
+var session = null, shownAt = 0, elapsedAtShow = 0;
+
+function leds(id, count) {
+  var parent = document.getElementById(id);
+  for (var i = 0; i < count; i++) {
+    var led = document.createElement("div");
+    led.className = "led";
+    parent.appendChild(led);
+  }
+  return parent.children;
+}
+var grid = leds("leds", 64), key = leds("key", 4);
+
+function show(state) {
+  session = state.id;
+  localStorage.setItem("greco-session", session);
+  for (var i = 0; i < 64; i++) grid[i].style.background = state.leds[i];
+  for (var j = 0; j < 4; j++) key[j].style.background = state.key[j] || "";
+  document.getElementById("level").textContent = state.level;
+  document.getElementById("wpm").textContent = state.wpm;
+  document.getElementById("average").textContent = state.average_wpm;
+  document.getElementById("accuracy").textContent = state.accuracy;
+  document.getElementById("char").textContent = state.key_char;
+  shownAt = Date.now();
+  elapsedAtShow = state.elapsed;
+}
+
+function call(method, path, body) {
+  return fetch(path, {method: method, body: body && JSON.stringify(body),
+                      headers: {"Content-Type": "application/json"}})
+    .then(function (response) {
+      if (!response.ok) throw new Error(response.status);
+      return response.json();
+    });
+}
+
+function start() {
+  return call("POST", "/api/sessions").then(show);
+}
+
+var saved = localStorage.getItem("greco-session");
+(saved ? call("GET", "/api/sessions/" + saved).then(show, start)
+       : start());
+
+document.getElementById("guess").addEventListener("keydown", function (e) {
+  if (e.key !== "Enter" || !session) return;
+  var input = e.target, guess = input.value;
+  input.value = "";
+  call("POST", "/api/sessions/" + session + "/guess", {guess: guess})
+    .then(function (result) {
+      document.getElementById("wrong").textContent =
+        result.guess === result.target ? "" :
+        "You wrote: " + result.guess + " Correct answer: " + result.target;
+      show(result.state);
+    }, start);
+});
+
+setInterval(function () {
+  var seconds = Math.floor(elapsedAtShow + (Date.now() - shownAt) / 1000);
+  var minutes = Math.floor(seconds / 60);
+  seconds = seconds % 60;
+  document.getElementById("clock").textContent =
+    (minutes < 10 ? "0" : "") + minutes + ":" +
+    (seconds < 10 ? "0" : "") + seconds;
+}, 250);
+</script>
+</body>
+</html>
+"""
+
+
+def main(argv=None):
+    """Serve sessions of the game to web browsers."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='address to listen on (default 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--adaptive', action='store_true',
+                        help='choose words to practise the characters '
+                        'each learner gets wrong or is slow at')
+    parser.add_argument('--verbose', action='store_true',
+                        help='log every request')
+    args = parser.parse_args(argv)
+
+    sessions = SessionServer(adaptive=args.adaptive)
+    server = GrecoHTTPServer((args.host, args.port), sessions, args.verbose)
+    print('Serving Greco on http://%s:%d/' % server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""Simulate many learners playing the game, to help design the levels.
+
+Each simulated learner types at a speed drawn from a normal
+distribution and mistypes each character with a fixed probability.
+Sessions are played by the headless engine across a pool of worker
+processes, and the level reached after each guess is summarised over
+all the sessions of a learner model.
+
+    python -m greco.simulate --sessions 1000 --guesses 300 \\
+        --learner 0.02:25:5 --learner 0.1:15:5 -o curves.csv
+
+Every session is seeded from --seed and its own number, so the results
+are the same whatever the number of worker processes.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+
+import argparse
+import csv
+import json
+import multiprocessing
+import random
+import sys
+from collections import namedtuple
+
+from .engine import Engine, LETTERS, SUBMIT
+from .levels import LevelIndex, load_levels
+
+# A simulated learner: the chance of mistyping each character, and the
+# mean and standard deviation of their words per minute.
+LearnerModel = namedtuple('LearnerModel', ('error_rate', 'wpm', 'wpm_sd'))
+
+# The least words per minute a simulated learner types at
+MIN_WPM = 1
+
+# The columns of the summary
+FIELDS = ('error_rate', 'wpm', 'wpm_sd', 'guess', 'mean_level', 'p10_level',
+          'median_level', 'p90_level', 'mean_minutes')
+
+# The level corpus, loaded once in each worker process
+_LEVELS = None
+
+
+def _load_corpus():
+    """Load the level corpus for this process."""
+    global _LEVELS  # pylint: disable=global-statement
+    _LEVELS = LevelIndex(load_levels(), LETTERS)
+
+
+def parse_learner(text):
+    """Parse a learner model given as ERROR_RATE:WPM:WPM_SD."""
+    try:
+        error_rate, wpm, wpm_sd = (float(part) for part in text.split(':'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'learner must be ERROR_RATE:WPM:WPM_SD, not %r' % text)
+    return LearnerModel(error_rate, wpm, wpm_sd)
+
+
+def positive_int(text):
+    """Parse a whole number that is at least one."""
+    try:
+        number = int(text)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            'must be a whole number of at least 1, not %r' % text)
+    return number
+
+
+def _type_guess(learner, target, rng):
+    """Return what the learner types for target."""
+    return ''.join(rng.choice(LETTERS) if rng.random() < learner.error_rate
+                   else character for character in target)
+
+
+def play_session(learner, seed, guesses, adaptive=False):
+    """Play one session and return the level after each guess and the
+    time of each guess in seconds."""
+    if _LEVELS is None:
+        _load_corpus()
+    engine = Engine(_LEVELS, seed='%s:engine' % seed, adaptive=adaptive)
+    rng = random.Random('%s:learner' % seed)
+    timestamp = 0.0
+    levels = []
+    times = []
+    for _ in range(guesses):
+        guess = _type_guess(learner, engine.current_target, rng)
+        seconds = 60 / max(rng.gauss(learner.wpm, learner.wpm_sd), MIN_WPM)
+        step = seconds / (len(guess) + 1)
+        keystrokes = []
+        for character in guess:
+            timestamp += step
+            keystrokes.append((timestamp, character))
+        timestamp += step
+        keystrokes.append((timestamp, SUBMIT))
+        engine.run(keystrokes)
+        levels.append(engine.info['level'])
+        times.append(timestamp)
+    return levels, times
+
+
+def _play_session(job):
+    """Unpack a job for the process pool."""
+    return play_session(*job)
+
+
+def _percentile(ordered, fraction):
+    """Get a percentile of an ordered list by the nearest rank."""
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def summarise(learner, sessions):
+    """Summarise the level progression of a learner's sessions."""
+    rows = []
+    levels_by_guess = zip(*(levels for levels, _ in sessions))
+    times_by_guess = zip(*(times for _, times in sessions))
+    for index, (levels, times) in enumerate(
+            zip(levels_by_guess, times_by_guess)):
+        ordered = sorted(levels)
+        rows.append({
+            'error_rate': learner.error_rate,
+            'wpm': learner.wpm,
+            'wpm_sd': learner.wpm_sd,
+            'guess': index + 1,
+            'mean_level': round(sum(ordered) / len(ordered), 3),
+            'p10_level': _percentile(ordered, 0.1),
+            'median_level': _percentile(ordered, 0.5),
+            'p90_level': _percentile(ordered, 0.9),
+            'mean_minutes': round(sum(times) / len(times) / 60, 3),
+        })
+    return rows
+
+
+def simulate(learners, sessions, guesses, seed=0, processes=None,
+             adaptive=False):
+    """Play sessions for each learner model and return the summary
+    rows."""
+    pool = multiprocessing.Pool(processes, initializer=_load_corpus)
+    try:
+        rows = []
+        for number, learner in enumerate(learners):
+            jobs = [(learner, '%d:%d:%d' % (seed, number, session), guesses,
+                     adaptive)
+                    for session in range(sessions)]
+            results = pool.map(_play_session, jobs,
+                               chunksize=max(1, sessions // 64))
+            rows.extend(summarise(learner, results))
+    finally:
+        pool.close()
+        pool.join()
+    return rows
+
+
+def main(argv=None):
+    """Simulate learners playing the game and write the level
+    progression curves."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--learner', action='append', type=parse_learner,
+                        metavar='ERROR_RATE:WPM:WPM_SD',
+                        help='a learner model, can be given more than '
+                        'once (default 0.05:20:5)')
+    parser.add_argument('--sessions', type=positive_int, default=100,
+                        help='sessions to play per learner model')
+    parser.add_argument('--guesses', type=positive_int, default=200,
+                        help='guesses per session')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes (default: one per core)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='choose targets by the adaptive scheduler')
+    parser.add_argument('--format', choices=('csv', 'json'), default='csv')
+    parser.add_argument('-o', '--output', help='file to write the curves '
+                        'to (default: standard output)')
+    args = parser.parse_args(argv)
+
+    learners = args.learner or [LearnerModel(0.05, 20, 5)]
+    rows = simulate(learners, args.sessions, args.guesses, args.seed,
+                    args.processes, args.adaptive)
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        if args.format == 'json':
+            json.dump(rows, output, indent=1)
+            output.write('\n')
+        else:
+            writer = csv.DictWriter(output, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
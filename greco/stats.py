@@ -0,0 +1,217 @@
+"""Statistics of the player's guesses.
+
+Words per minute and accuracy are kept in fixed size windows of the
+most recent values, with running totals so that their means cost the
+same however long the session has been going.
+
+Heavier analysis (percentiles, trends and error rates per character)
+is done in bulk, with NumPy if it is installed, and only worked out
+again when the underlying values have changed. NumPy is only imported
+when it is first needed, as it is slow to import.
+
+"""
+
+from __future__ import division
+
+from collections import deque
+
+# NumPy once it has been looked for, None if it is not installed
+_NUMPY = False
+
+
+def _get_numpy():
+    """Import NumPy the first time it is needed."""
+    global _NUMPY  # pylint: disable=global-statement
+    if _NUMPY is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _NUMPY = numpy
+    return _NUMPY
+
+
+class RollingStat(object):
+    """The most recent size values of a statistic, with running means.
+
+    Supports len(), iteration and indexing over the values in the
+    window, oldest first, like the list it replaces.
+    """
+    __slots__ = ('_window', '_window_sum', '_sum', 'count', 'version')
+
+    def __init__(self, size, values=()):
+        self._window = deque(maxlen=size)
+        self._window_sum = 0
+        self._sum = 0
+        self.count = 0
+        self.version = 0
+        self.extend(values)
+
+    def __len__(self):
+        return len(self._window)
+
+    def __iter__(self):
+        return iter(self._window)
+
+    def __getitem__(self, index):
+        return self._window[index]
+
+    def __repr__(self):
+        return 'RollingStat(%d, %r)' % (self._window.maxlen,
+                                        list(self._window))
+
+    @property
+    def size(self):
+        """The most values kept in the window."""
+        return self._window.maxlen
+
+    def append(self, value):
+        """Add a value, dropping the oldest one if the window is full."""
+        if len(self._window) == self._window.maxlen:
+            self._window_sum -= self._window[0]
+        self._window.append(value)
+        self._window_sum += value
+        self._sum += value
+        self.count += 1
+        self.version += 1
+
+    def extend(self, values):
+        """Add several values."""
+        for value in values:
+            self.append(value)
+
+    def clear(self, values=()):
+        """Forget all the values, then add values."""
+        self._window.clear()
+        self._window_sum = 0
+        self._sum = 0
+        self.count = 0
+        self.version += 1
+        self.extend(values)
+
+    def get_state(self):
+        """Get the window and totals as plain data."""
+        return {'size': self._window.maxlen, 'values': list(self._window),
+                'count': self.count, 'sum': self._sum}
+
+    def set_state(self, state):
+        """Replace the window and totals with ones got by get_state."""
+        self._window = deque(maxlen=state['size'])
+        self.clear(state['values'])
+        self.count = state['count']
+        self._sum = state['sum']
+
+    @property
+    def mean(self):
+        """The mean of the values in the window."""
+        if not self._window:
+            return 0
+        return self._window_sum / len(self._window)
+
+    @property
+    def total_mean(self):
+        """The mean of every value added since the last clear."""
+        if not self.count:
+            return 0
+        return self._sum / self.count
+
+
+def _percentiles(values, percents):
+    """Get percentiles of values, interpolating between ranks."""
+    numpy = _get_numpy()
+    if numpy is not None:
+        return [float(value) for value in numpy.percentile(values, percents)]
+    ordered = sorted(values)
+    results = []
+    for percent in percents:
+        position = (len(ordered) - 1) * percent / 100
+        lower = int(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        results.append(ordered[lower] +
+                       (ordered[upper] - ordered[lower]) * (position - lower))
+    return results
+
+
+def _trend(values):
+    """Get the least squares slope of values per guess."""
+    count = len(values)
+    if count < 2:
+        return 0.0
+    numpy = _get_numpy()
+    if numpy is not None:
+        return float(numpy.polyfit(numpy.arange(count), values, 1)[0])
+    mean_x = (count - 1) / 2
+    mean_y = sum(values) / count
+    covariance = sum((index - mean_x) * (value - mean_y)
+                     for index, value in enumerate(values))
+    variance = sum((index - mean_x) ** 2 for index in range(count))
+    return covariance / variance
+
+
+class Analytics(object):
+    """Bulk statistics of a session, worked out when asked for and
+    kept until the values change."""
+    def __init__(self):
+        self.attempts = {}
+        self.errors = {}
+        self.confusions = {}
+        self._version = 0
+        self._cache = {}
+
+    def _get_cached(self, name, version, work_out):
+        """Get the result of work_out, calling it only if version has
+        changed since the last time."""
+        cached = self._cache.get(name)
+        if cached is None or cached[0] != version:
+            cached = (version, work_out())
+            self._cache[name] = cached
+        return cached[1]
+
+    def record(self, target, confusions):
+        """Count the characters of target, and the ones that were got
+        wrong according to the confusions of its score."""
+        for character in target:
+            self.attempts[character] = self.attempts.get(character, 0) + 1
+        for confusion in confusions:
+            if confusion[0]:
+                self.errors[confusion[0]] = (
+                    self.errors.get(confusion[0], 0) + 1)
+            self.confusions[confusion] = (
+                self.confusions.get(confusion, 0) + 1)
+        self._version += 1
+
+    def get_state(self):
+        """Get the counts as plain data."""
+        return {
+            'attempts': dict(self.attempts),
+            'errors': dict(self.errors),
+            'confusions': [[target, typed, count] for (target, typed), count
+                           in self.confusions.items()],
+        }
+
+    def set_state(self, state):
+        """Replace the counts with ones got by get_state."""
+        self.attempts = dict(state['attempts'])
+        self.errors = dict(state['errors'])
+        self.confusions = dict(((target, typed), count) for
+                               target, typed, count in state['confusions'])
+        self._version += 1
+
+    def error_rates(self):
+        """Get the fraction of each character that was got wrong."""
+        return self._get_cached('error_rates', self._version, lambda: dict(
+            (character, self.errors.get(character, 0) / attempts)
+            for character, attempts in self.attempts.items()))
+
+    def summarise(self, name, stat):
+        """Get the percentiles and trend of the values in stat."""
+        def work_out():
+            """Work out the summary of the values."""
+            values = list(stat)
+            if values:
+                p10, p50, p90, p99 = _percentiles(values, (10, 50, 90, 99))
+            else:
+                p10 = p50 = p90 = p99 = 0
+            return {'p10': p10, 'p50': p50, 'p90': p90, 'p99': p99,
+                    'trend': _trend(values)}
+        return self._get_cached(name, stat.version, work_out)
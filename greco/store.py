@@ -0,0 +1,226 @@
+"""Saving the player's progress between games.
+
+Every submitted guess is appended to a log, one line of JSON each,
+and now and again the whole of the progress is written to a snapshot,
+after which the log is emptied. A game carries on from where it was
+left by loading the snapshot and replaying the guesses logged since.
+
+The files are written by a background thread, so saving never holds
+up drawing the screen. The log is flushed to disk in batches, every
+SYNC_EVERY guesses or SYNC_INTERVAL seconds, so a crash loses at most
+the last few guesses. Snapshots are written to a temporary file and
+renamed into place, so there is always a whole one.
+
+    store = SessionStore(os.path.expanduser('~/.greco'))
+    store.resume(engine)
+    ...
+    store.record(engine.submit(timestamp))
+    ...
+    store.close()
+
+"""
+
+import json
+import os
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+LOG = 'log.jsonl'
+SNAPSHOT = 'snapshot.json'
+SNAPSHOT_VERSION = 1
+
+# How many guesses, or how many seconds, the log is written for
+# before it is flushed to disk
+SYNC_EVERY = 10
+SYNC_INTERVAL = 1.0
+
+# How many guesses are logged between snapshots
+SNAPSHOT_EVERY = 100
+
+# Atomic on Python 3, also over an existing file on Windows
+_replace = getattr(os, 'replace', os.rename)  # pylint: disable=invalid-name
+
+
+class StoreError(Exception):
+    """The saved progress can not be read."""
+
+
+class SessionStore(object):
+    """Saves the progress of an engine in directory."""
+    def __init__(self, directory, snapshot_every=SNAPSHOT_EVERY):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.engine = None
+        self.sequence = 0
+        self.error = None
+        self._snapshot_sequence = 0
+        self._requests = queue.Queue()
+        self._thread = None
+
+    def _path(self, name):
+        """Get the path of a file of the store."""
+        return os.path.join(self.directory, name)
+
+    def load(self):
+        """Read the snapshot, or None if there is not one yet, and the
+        guesses logged after it."""
+        snapshot = None
+        try:
+            with open(self._path(SNAPSHOT)) as snapshot_file:
+                snapshot = json.load(snapshot_file)
+        except (IOError, OSError):
+            pass
+        except ValueError as error:
+            raise StoreError('%s is damaged: %s' % (SNAPSHOT, error))
+        if snapshot is not None and (
+                snapshot.get('version') != SNAPSHOT_VERSION):
+            raise StoreError('%s has unknown version %r' % (
+                SNAPSHOT, snapshot.get('version')))
+
+        sequence = snapshot['sequence'] if snapshot else 0
+        entries, _ = self._read_log()
+        # Anything older is already in the snapshot
+        return snapshot, [entry for entry in entries if entry['n'] > sequence]
+
+    def _read_log(self):
+        """Read the whole lines of the log. Return their entries and how
+        many bytes of the log they take up."""
+        entries = []
+        length = 0
+        try:
+            with open(self._path(LOG), 'rb') as log:
+                for line in log:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError('no end of line')
+                        entry = json.loads(line.decode('utf-8'))
+                    except ValueError:
+                        # The end of the log was cut off by a crash
+                        break
+                    entries.append(entry)
+                    length += len(line)
+        except (IOError, OSError):
+            pass
+        return entries, length
+
+    def _repair_log(self):
+        """Cut anything after the last whole line off the log, so that
+        new guesses are not appended to a line cut off by a crash."""
+        _, length = self._read_log()
+        try:
+            with open(self._path(LOG), 'r+b') as log:
+                log.seek(0, os.SEEK_END)
+                if log.tell() > length:
+                    log.truncate(length)
+                    _sync(log)
+        except (IOError, OSError):
+            pass
+
+    def resume(self, engine):
+        """Carry on the saved progress in engine, and save its progress
+        from now on."""
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        snapshot, entries = self.load()
+        self._repair_log()
+        if snapshot is not None:
+            engine.set_state(snapshot['engine'])
+            self.sequence = snapshot['sequence']
+        self._snapshot_sequence = self.sequence
+        for entry in entries:
+            engine.apply(entry['target'], entry['guess'], entry['seconds'])
+            self.sequence = entry['n']
+        if snapshot is not None or entries:
+            engine.new_target(engine.started)
+        self.engine = engine
+        self._thread = threading.Thread(target=self._write)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def record(self, result):
+        """Log the result of a submitted guess."""
+        self.sequence += 1
+        self._requests.put(('log', {
+            'n': self.sequence,
+            'target': result.target,
+            'guess': result.guess,
+            'seconds': result.seconds,
+            'accuracy': result.accuracy,
+        }))
+        if self.sequence - self._snapshot_sequence >= self.snapshot_every:
+            self.snapshot()
+
+    def snapshot(self):
+        """Save the whole of the engine's progress."""
+        self._snapshot_sequence = self.sequence
+        self._requests.put(('snapshot', {
+            'version': SNAPSHOT_VERSION,
+            'sequence': self.sequence,
+            'engine': self.engine.get_state(),
+        }))
+
+    def _write(self):
+        """Write the log and snapshots until told to stop."""
+        try:
+            with open(self._path(LOG), 'a') as log:
+                self._write_requests(log)
+        except (IOError, OSError) as error:
+            # Carry on playing, the game can not be saved
+            self.error = error
+
+    def _write_requests(self, log):
+        """Write the requests to log or to snapshots."""
+        unsynced = 0
+        while True:
+            try:
+                request = self._requests.get(
+                    timeout=SYNC_INTERVAL if unsynced else None)
+            except queue.Empty:
+                _sync(log)
+                unsynced = 0
+                continue
+            if request is None:
+                _sync(log)
+                return
+            kind, data = request
+            if kind == 'log':
+                log.write(json.dumps(data, sort_keys=True) + '\n')
+                unsynced += 1
+                if unsynced >= SYNC_EVERY:
+                    _sync(log)
+                    unsynced = 0
+            else:
+                self._write_snapshot(data)
+                # Everything logged so far is in the snapshot
+                log.truncate(0)
+                _sync(log)
+                unsynced = 0
+
+    def _write_snapshot(self, snapshot):
+        """Write a snapshot in place of the old one."""
+        path = self._path(SNAPSHOT)
+        temporary = path + '.tmp'
+        with open(temporary, 'w') as snapshot_file:
+            json.dump(snapshot, snapshot_file, sort_keys=True)
+            _sync(snapshot_file)
+        _replace(temporary, path)
+
+    def close(self):
+        """Save a snapshot, and wait for everything to be written."""
+        if self._thread is None:
+            return
+        if self.sequence != self._snapshot_sequence:
+            self.snapshot()
+        self._requests.put(None)
+        self._thread.join()
+        self._thread = None
+
+
+def _sync(open_file):
+    """Flush open_file all the way to the disk."""
+    open_file.flush()
+    os.fsync(open_file.fileno())
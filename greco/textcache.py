@@ -0,0 +1,46 @@
+"""Cache of rendered text surfaces.
+
+Rendering text with a font is slow compared to blitting, and most of
+the text in the game (labels, headings, scores) stays the same for
+many frames, so rendered surfaces are kept and reused.
+
+"""
+
+from collections import OrderedDict
+
+
+class TextCache(object):
+    """Least recently used cache of surfaces rendered by font.render,
+    keyed by font, text and colour.
+    """
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._surfaces = OrderedDict()
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def render(self, font, text, colour, antialias=1):
+        """Return a surface of text rendered with font, rendering it
+        only if it is not cached already."""
+        if not isinstance(colour, tuple):
+            # Lists and pygame.Color cannot be keys
+            colour = tuple(colour)
+        key = (font, text, colour, antialias)
+        try:
+            surface = self._surfaces.pop(key)
+        except KeyError:
+            surface = font.render(text, antialias, colour)
+            if len(self._surfaces) >= self.maxsize:
+                self._surfaces.popitem(last=False)
+        self._surfaces[key] = surface
+        return surface
+
+    def invalidate(self, font=None):
+        """Forget the surfaces rendered with font, or every surface if
+        no font is given."""
+        if font is None:
+            self._surfaces.clear()
+        else:
+            for key in [key for key in self._surfaces if key[0] is font]:
+                del self._surfaces[key]
@@ -32,6 +32,6 @@ setup(name="greco",
           'greencode',
           'pygame'
       ],
-      scripts=['bin/greco'],
+      scripts=['bin/greco', 'bin/greco-simulate', 'bin/greco-server'],
       include_package_data = True
 )
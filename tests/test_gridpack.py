@@ -0,0 +1,70 @@
+"""Tests of the grid pack format."""
+
+import os
+import unittest
+
+from greencode import GreenCode
+
+from greco.gridpack import (GridPack, GridPackError, compile_word,
+                            compile_words, load_grid_pack, write_pack)
+from greco.levelpack import LevelPack
+from greco.levels import DIRECTORY
+
+from .test_levelpack import LEVELS, PackTestCase
+
+
+class GridPackTest(PackTestCase):
+    """Compiling, writing and reading grid packs."""
+    def write_grids(self, levels):
+        """Compile the words of levels into a grid pack and open it."""
+        words = [levels.word(number) for number in range(levels.word_count)]
+        grids = [compile_word(word)[0] for word in words]
+        path = os.path.join(self.directory, 'grids.pack')
+        with open(path, 'wb') as pack_buf:
+            write_pack(levels, grids, pack_buf)
+        return GridPack(path, levels)
+
+    def test_round_trip(self):
+        """The grids read back are the first grids of the words."""
+        levels = self.write_levels(LEVELS)
+        grids = self.write_grids(levels)
+        gcode = GreenCode()
+        for level in range(len(levels)):
+            for word in levels[level]:
+                self.assertEqual(grids.get(word),
+                                 tuple(gcode.parse_message(word)[0]))
+        self.assertIsNone(grids.get(u'kettle'))
+
+    def test_problems(self):
+        """Words that do not fit one grid or can not be shown are
+        found."""
+        self.assertIsNone(compile_word(u'teapot')[1])
+        self.assertIn('needs 2 grids', compile_word(u'teapot' * 4)[1])
+        self.assertIn(u'has no symbols for \u2603',
+                      compile_word(u'tea\u2603')[1])
+        self.assertIn('is blank', compile_word(u'')[1])
+        grids, problems = compile_words(
+            [u'tea', u'teapot' * 4, u'pot'], processes=1)
+        self.assertEqual(len(grids), 3)
+        self.assertEqual([word for word, _ in problems], [u'teapot' * 4])
+
+    def test_other_levels(self):
+        """A grid pack is not used with levels it was not made from."""
+        levels = self.write_levels(LEVELS)
+        self.write_grids(levels)
+        other = self.write_levels(LEVELS[:-1], 'other.pack')
+        with self.assertRaises(GridPackError):
+            GridPack(os.path.join(self.directory, 'grids.pack'), other)
+        self.assertIsNone(load_grid_pack(other, self.directory))
+        self.assertIsNotNone(load_grid_pack(levels, self.directory))
+        self.assertIsNone(load_grid_pack(LEVELS, self.directory))
+
+    def test_shipped_pack_is_up_to_date(self):
+        """The grid pack that comes with the game was made from its level
+        pack."""
+        levels = LevelPack(os.path.join(DIRECTORY, 'levels.pack'))
+        self.assertIsNotNone(load_grid_pack(levels))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""Tests of recording keystrokes and playing them again."""
+
+import os
+import random
+import shutil
+import struct
+import tempfile
+import unittest
+
+from greco.engine import BACKSPACE, Engine, SUBMIT
+from greco.keylog import (KeyLogError, KeyLogReader, KeyRecorder, check,
+                          replay)
+
+
+def record(path, guesses=30, adaptive=False):
+    """Record a game of guesses, with typos and corrections, and return
+    the engine it was played by."""
+    engine = Engine(adaptive=adaptive)
+    recorder = KeyRecorder(path, engine)
+    rng = random.Random(1)
+    timestamp = 0.0
+    keystrokes = []
+    for _ in range(guesses):
+        for character in engine.current_target:
+            if rng.random() < 0.1:
+                keystrokes.append(rng.choice('xyz'))
+                if rng.random() < 0.5:
+                    keystrokes.append(BACKSPACE)
+            keystrokes.append(character)
+        keystrokes.append(SUBMIT)
+        for keystroke in keystrokes:
+            timestamp += rng.uniform(0.05, 0.5)
+            if keystroke == SUBMIT:
+                recorder.submit(timestamp)
+            elif keystroke == BACKSPACE:
+                recorder.backspace(timestamp)
+            else:
+                recorder.press(timestamp, keystroke)
+            engine.run([(timestamp, keystroke)])
+        del keystrokes[:]
+    recorder.close()
+    return engine
+
+
+class KeyLogTest(unittest.TestCase):
+    """Recording, replaying and checking key logs."""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'game.keys')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_replay(self):
+        """A replay finishes with the progress the game finished with."""
+        for adaptive in (False, True):
+            engine = record(self.path, adaptive=adaptive)
+            replayed, results, reader = replay(self.path)
+            self.assertEqual(len(results), 30)
+            self.assertEqual(replayed.get_state(), engine.get_state())
+            self.assertEqual(reader.header['adaptive'], adaptive)
+            self.assertEqual(check(self.path)[0], [])
+
+    def test_changed_keystroke(self):
+        """A log whose keystrokes were changed does not check."""
+        record(self.path)
+        reader = KeyLogReader(self.path)
+        # pylint: disable=protected-access
+        position = reader._start + struct.calcsize('<dH') * 3
+        with open(self.path, 'r+b') as log:
+            log.seek(position + 8)
+            log.write(struct.pack('<H', ord('q')))
+        differences, _ = check(self.path)
+        self.assertTrue(differences)
+
+    def test_cut_off(self):
+        """A log cut off by a crash replays, but can not be checked."""
+        record(self.path)
+        size = os.path.getsize(self.path)
+        with open(self.path, 'r+b') as log:
+            log.truncate(size - 100)
+        differences, results = check(self.path)
+        self.assertIsNone(differences)
+        self.assertTrue(results)
+
+    def test_not_a_log(self):
+        """Other files are refused."""
+        with open(self.path, 'wb') as log:
+            log.write(b'GRLP\x01\x00')
+        with self.assertRaises(KeyLogError):
+            KeyLogReader(self.path)
+        with open(self.path, 'wb') as log:
+            log.write(b'GR')
+        with self.assertRaises(KeyLogError):
+            KeyLogReader(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Tests of the level pack format."""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from greco.levelpack import LevelPack, LevelPackError, write_pack
+from greco.levels import DIRECTORY
+
+LEVELS = [
+    [u'e', u'ee', u'tea', u'eat'],
+    [],
+    [u'tea', u'pot', u'teapot', u'caf\xe9'],
+    [u'pot'] * 3,
+]
+
+
+class PackTestCase(unittest.TestCase):
+    """Gives each test a directory to write packs to."""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_levels(self, levels, name='levels.pack'):
+        """Write levels to a level pack and open it."""
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as pack_buf:
+            write_pack(levels, pack_buf)
+        return LevelPack(path)
+
+
+class LevelPackTest(PackTestCase):
+    """Writing and reading level packs."""
+    def test_round_trip(self):
+        """The levels read back are the levels written."""
+        pack = self.write_levels(LEVELS)
+        self.assertEqual(len(pack), len(LEVELS))
+        self.assertEqual([list(level) for level in pack], LEVELS)
+        self.assertEqual(pack.word_count, 7)
+        with self.assertRaises(IndexError):
+            pack[len(LEVELS)]  # pylint: disable=pointless-statement
+
+    def test_word_numbers(self):
+        """Each distinct word has one number, known once its level has
+        been read."""
+        pack = self.write_levels(LEVELS)
+        self.assertIsNone(pack.number(u'pot'))
+        pack[2]  # pylint: disable=pointless-statement
+        self.assertEqual(pack.word(pack.number(u'pot')), u'pot')
+        self.assertEqual(pack.word(pack.number(u'caf\xe9')), u'caf\xe9')
+        self.assertEqual(
+            sorted(pack.word(number) for number in range(pack.word_count)),
+            sorted(set(word for level in LEVELS for word in level)))
+
+    def test_checksum(self):
+        """Packs of different levels have different checksums."""
+        first = self.write_levels(LEVELS, 'first.pack')
+        second = self.write_levels(LEVELS[:-1], 'second.pack')
+        self.assertNotEqual(first.checksum, second.checksum)
+        self.assertEqual(first.checksum,
+                         self.write_levels(LEVELS, 'again.pack').checksum)
+
+    def test_not_a_pack(self):
+        """Other files are refused."""
+        for data in (b'', b'GRLP', b'JUNK' + b'\0' * 12):
+            path = os.path.join(self.directory, 'junk.pack')
+            with open(path, 'wb') as junk:
+                junk.write(data)
+            with self.assertRaises(LevelPackError):
+                LevelPack(path)
+
+    def test_shipped_pack_is_up_to_date(self):
+        """The level pack that comes with the game holds the levels of
+        the JSON files."""
+        levels = []
+        for name in ('levels1.json', 'levels2.json'):
+            path = os.path.join(DIRECTORY, name)
+            if os.path.exists(path):
+                with open(path) as level_buf:
+                    levels.extend(json.load(level_buf))
+        pack_buf = io.BytesIO()
+        write_pack(levels, pack_buf)
+        with open(os.path.join(DIRECTORY, 'levels.pack'), 'rb') as shipped:
+            self.assertEqual(shipped.read(), pack_buf.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
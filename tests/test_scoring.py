@@ -0,0 +1,109 @@
+"""Tests of the scoring of guesses."""
+
+import random
+import unittest
+
+from greco.engine import MAX_GUESS_LENGTH
+from greco.scoring import BAND, score_guess
+
+
+def levenshtein(target, guess):
+    """The edit distance between target and guess, from the full
+    table."""
+    previous = list(range(len(guess) + 1))
+    for row, target_char in enumerate(target, 1):
+        current = [row]
+        for column, guess_char in enumerate(guess, 1):
+            current.append(min(previous[column - 1] +
+                               (target_char != guess_char),
+                               previous[column] + 1,
+                               current[column - 1] + 1))
+        previous = current
+    return previous[-1]
+
+
+def is_subsequence(part, whole):
+    """Whether the characters of part appear in whole in order."""
+    characters = iter(whole)
+    return all(character in characters for character in part)
+
+
+def random_pairs(count, seed=0):
+    """Make count (target, guess) pairs, with guesses near and far from
+    their targets, from a small alphabet so that they often align."""
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        target = ''.join(rng.choice('abcd')
+                         for _ in range(rng.randint(1, MAX_GUESS_LENGTH)))
+        guess = list(target)
+        for _ in range(rng.randint(0, 8)):
+            position = rng.randint(0, len(guess))
+            edit = rng.random()
+            if edit < 0.4 and position < len(guess):
+                guess[position] = rng.choice('abcde')
+            elif edit < 0.7:
+                guess.insert(position, rng.choice('abcde'))
+            elif guess and position < len(guess):
+                del guess[position]
+        pairs.append((target, ''.join(guess)))
+    return pairs
+
+
+class ScoreGuessTest(unittest.TestCase):
+    """score_guess against a full Levenshtein distance."""
+    pairs = random_pairs(5000)
+
+    def test_perfect(self):
+        """A right guess scores 100 with nothing confused."""
+        self.assertEqual(score_guess('teapot', 'teapot'), (100, 0, ()))
+
+    def test_within_band_is_exact(self):
+        """The banded distance is the edit distance when that is no
+        more than the band, and an upper bound of it otherwise."""
+        for target, guess in self.pairs:
+            distance = levenshtein(target, guess)
+            score = score_guess(target, guess)
+            if distance <= BAND:
+                self.assertEqual(score.distance, distance, (target, guess))
+            else:
+                self.assertGreaterEqual(score.distance, distance,
+                                        (target, guess))
+
+    def test_wide_band_is_exact(self):
+        """With a band as wide as the guesses, the distance is always
+        the edit distance."""
+        for target, guess in self.pairs:
+            self.assertEqual(
+                score_guess(target, guess, band=2 * MAX_GUESS_LENGTH).distance,
+                levenshtein(target, guess), (target, guess))
+
+    def test_confusions_are_the_edits(self):
+        """There is one confusion for each edit, and they are mistakes
+        taken in order from the target and the guess."""
+        for target, guess in self.pairs:
+            score = score_guess(target, guess)
+            confusions = score.confusions
+            self.assertEqual(len(confusions), score.distance)
+            for wanted, typed in confusions:
+                self.assertNotEqual(wanted, typed)
+            extra = sum(1 for wanted, _ in confusions if not wanted)
+            missed = sum(1 for _, typed in confusions if not typed)
+            self.assertEqual(len(guess) - len(target), extra - missed)
+            self.assertTrue(is_subsequence(
+                ''.join(wanted for wanted, _ in confusions), target))
+            self.assertTrue(is_subsequence(
+                ''.join(typed for _, typed in confusions), guess))
+
+    def test_accuracy(self):
+        """Accuracy is the share of the longer word that was right."""
+        score = score_guess('teapot', 'teapit')
+        self.assertEqual(score.distance, 1)
+        self.assertEqual(score.accuracy, round(100 * 5 / 6.0))
+        self.assertEqual(score.confusions, (('o', 'i'),))
+        self.assertEqual(score_guess('tea', '').accuracy, 0)
+        self.assertEqual(score_guess('e', 'eeeeeeeeee').accuracy, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+"""Tests of saving and carrying on progress with the session store."""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from greco import store
+from greco.engine import Engine
+from greco.store import LOG, SessionStore, StoreError
+
+
+def play(engine, session_store, guesses, start=0):
+    """Submit guesses, some right and some wrong, and record them."""
+    for number in range(start, start + guesses):
+        guess = engine.current_target if number % 3 else 'x'
+        session_store.record(engine.submit(number + 1.0, guess))
+
+
+def comparable(engine):
+    """The progress of engine, as it would be after going through
+    JSON."""
+    return json.loads(json.dumps(engine.get_state()))
+
+
+def resume(engine, directory):
+    """Carry on the progress saved in directory in engine."""
+    session_store = SessionStore(directory)
+    session_store.resume(engine)
+    session_store.close()
+
+
+def stop(session_store):
+    """Stop writing without a last snapshot, as if the game crashed."""
+    session_store._requests.put(None)  # pylint: disable=protected-access
+    session_store._thread.join()  # pylint: disable=protected-access
+
+
+class SessionStoreTest(unittest.TestCase):
+    """Carrying on after closing, and after crashing."""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_new(self):
+        """There is nothing to load in a new store."""
+        self.assertEqual(SessionStore(self.directory).load(), (None, []))
+
+    def test_resume_after_close(self):
+        """The progress carries on from a closed store."""
+        engine = Engine(seed=1, adaptive=True)
+        session_store = SessionStore(self.directory, snapshot_every=7)
+        session_store.resume(engine)
+        play(engine, session_store, 23)
+        session_store.close()
+
+        resumed = Engine(seed=2, adaptive=True)
+        resume(resumed, self.directory)
+        self.assertEqual(comparable(resumed), comparable(engine))
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs fork')
+    def test_resume_after_crash(self):
+        """The progress synced to disk survives the process ending
+        without closing the store."""
+        expected = os.path.join(self.directory, 'expected.json')
+        pid = os.fork()
+        if pid == 0:
+            # The game, which crashes without saving a last snapshot
+            try:
+                store.SYNC_INTERVAL = 0.05
+                engine = Engine(seed=1)
+                session_store = SessionStore(self.directory, snapshot_every=7)
+                session_store.resume(engine)
+                play(engine, session_store, 23)
+                # Wait for the writer to sync the last guesses
+                time.sleep(0.5)
+                with open(expected, 'w') as expected_file:
+                    json.dump(engine.get_state(), expected_file)
+            finally:
+                os._exit(0)  # pylint: disable=protected-access
+        os.waitpid(pid, 0)
+
+        resumed = Engine(seed=2)
+        resume(resumed, self.directory)
+        with open(expected) as expected_file:
+            self.assertEqual(comparable(resumed), json.load(expected_file))
+
+    def test_cut_off_log(self):
+        """A guess only partly written when the game crashed is dropped,
+        and the guesses made after carrying on are kept."""
+        engine = Engine(seed=1)
+        session_store = SessionStore(self.directory, snapshot_every=1000)
+        session_store.resume(engine)
+        play(engine, session_store, 5)
+        stop(session_store)
+        with open(os.path.join(self.directory, LOG), 'a') as log:
+            log.write('{"n": 6, "target": "te')
+
+        snapshot, entries = SessionStore(self.directory).load()
+        self.assertIsNone(snapshot)
+        self.assertEqual([entry['n'] for entry in entries], [1, 2, 3, 4, 5])
+        engine = Engine(seed=2)
+        session_store = SessionStore(self.directory, snapshot_every=1000)
+        session_store.resume(engine)
+        play(engine, session_store, 5, start=5)
+        stop(session_store)
+
+        snapshot, entries = SessionStore(self.directory).load()
+        self.assertIsNone(snapshot)
+        self.assertEqual([entry['n'] for entry in entries],
+                         list(range(1, 11)))
+        resumed = Engine(seed=3)
+        resume(resumed, self.directory)
+        self.assertEqual(comparable(resumed), comparable(engine))
+
+    def test_damaged_snapshot(self):
+        """A snapshot that can not be read is reported."""
+        engine = Engine(seed=1)
+        session_store = SessionStore(self.directory)
+        session_store.resume(engine)
+        play(engine, session_store, 3)
+        session_store.close()
+        path = os.path.join(self.directory, store.SNAPSHOT)
+        with open(path, 'w') as snapshot_file:
+            snapshot_file.write('{"version": ')
+        with self.assertRaises(StoreError):
+            SessionStore(self.directory).load()
+
+
+if __name__ == '__main__':
+    unittest.main()